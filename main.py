@@ -1,28 +1,51 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from src.api.routes import router as api_router
+from src.config import settings
 from src.utils.logger import setup_logging
 
+# El logging se configura antes de importar las rutas: sus singletons
+# (GeminiService, AnswerStore, ...) ya loguean al crearse y con
+# LOG_FORMAT=json esas primeras líneas también deben salir en JSON
+setup_logging()
+
+from src.api.admin import RequestProfilingMiddleware, admin_router  # noqa: E402
+from src.api.admission import AdmissionMiddleware  # noqa: E402
+from src.api.middleware import RequestContextMiddleware  # noqa: E402
+from src.api.routes import get_admission_controller, router as api_router  # noqa: E402
 
-def create_app() -> FastAPI:
-    setup_logging()
 
+def create_app() -> FastAPI:
     app = FastAPI(
         title="RAG-Gemini Backend",
         version="1.1.0",
         description="Backend FastAPI para RAG con Gemini File Search.",
     )
 
-    # CORS básico (ajusta orígenes cuando tengas frontend)
+    # Profiling solo si está habilitado: apagado no agrega ningún costo
+    if settings.PROFILING_ENABLED and settings.PROFILING_ADMIN_TOKEN:
+        app.add_middleware(RequestProfilingMiddleware)
+        app.include_router(admin_router)
+
+    # Control de admisión antes de leer el body (uploads grandes incluidos)
+    app.add_middleware(AdmissionMiddleware, controller=get_admission_controller())
+
+    # CORS básico (ajusta orígenes cuando tengas frontend). Va por fuera de la
+    # admisión para que los 503 también lleven headers CORS y el navegador
+    # pueda leer Retry-After
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],  # ⚠️ para dev; en prod restringir
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["Retry-After", "ETag", "X-Request-ID"],
     )
 
+    # Request ID para correlacionar logs de rutas y servicios
+    # (se agrega al final para que sea el middleware más externo)
+    app.add_middleware(RequestContextMiddleware)
+
     app.include_router(api_router)
 
     return app
@@ -0,0 +1,82 @@
+# scripts/bench_logging.py
+"""
+Mide el overhead de logging por request (lado de la petición) con la
+configuración actual (LOG_FORMAT, LOG_LEVEL, LOG_MODULE_LEVELS, LOG_SAMPLE_RATE).
+
+Uso (desde la raíz del repo):
+    python -m scripts.bench_logging --requests 20000 --budget-us 500
+"""
+import argparse
+import os
+import sys
+import time
+
+
+def simulate_request(logger, sampled_logger, request_id: str) -> None:
+    """
+    Reproduce los eventos que emite una consulta típica a /query.
+    """
+    with logger.contextualize(request_id=request_id):
+        sampled_logger.info(
+            "🧭 Router -> {} | scores={} | {:.3f} ms",
+            ["tramites"],
+            {"leyes": 0.05, "tramites": 0.41},
+            0.02,
+        )
+        sampled_logger.info("♻️ Cache hit ({:.3f}) para store={} perfil={}", 0.9, "G", "default")
+        sampled_logger.info("📚 Fuentes extraídas: {}", 3)
+        logger.debug("📚 Fuentes extraídas (sin snippet): {}", ["a.pdf", "b.pdf", "c.pdf"])
+        sampled_logger.info("{} {} -> {} ({:.1f} ms)", "POST", "/query/G", 200, 812.4)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mide el costo de logging por request con la configuración actual."
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=20000,
+        help="Número de requests simulados (default: 20000).",
+    )
+    parser.add_argument(
+        "--budget-us",
+        type=float,
+        default=500.0,
+        help="Presupuesto de overhead por request en microsegundos (default: 500).",
+    )
+    args = parser.parse_args()
+
+    # Los handlers escriben a stdout: lo mandamos a /dev/null durante la medición
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        from src.utils.logger import logger, sampled_logger, setup_logging
+
+        setup_logging()
+
+        # Calentamiento
+        for i in range(200):
+            simulate_request(logger, sampled_logger, f"warmup-{i}")
+
+        start = time.perf_counter()
+        for i in range(args.requests):
+            simulate_request(logger, sampled_logger, f"req-{i}")
+        elapsed = time.perf_counter() - start
+
+        logger.complete()
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    per_request_us = elapsed / args.requests * 1_000_000
+    print(f"[+] {args.requests} requests simulados")
+    print(f"    Overhead de logging por request: {per_request_us:.1f} µs")
+    print(f"    Presupuesto: {args.budget_us:.1f} µs")
+
+    if per_request_us > args.budget_us:
+        raise SystemExit("[!] El overhead de logging excede el presupuesto.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# scripts/build_answer_store.py
+"""
+Construye el answer store (respuestas precalculadas) para las consultas más
+frecuentes de un store y perfil.
+
+Las consultas se minan de logs JSON (LOG_FORMAT=json, evento "query") o de un
+archivo de texto con una consulta por línea. Uso (desde la raíz del repo):
+
+    python -m scripts.build_answer_store \\
+        --store-name fileSearchStores/tramites-xxxx \\
+        --profile tramites \\
+        --log-file logs/api.jsonl --top 200
+"""
+import argparse
+import json
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from src.services.answer_store import AnswerStore, answer_key
+from src.services.gemini_service import GeminiService
+from src.services.prompt_service import PromptService
+from src.services.store_versions import StoreVersionRegistry
+from src.utils.logger import setup_logging
+
+
+def iter_logged_queries(
+    paths: List[Path],
+    store_name: str,
+    profile: str,
+) -> Iterable[str]:
+    """
+    Regresa las consultas de los eventos "query" del store/perfil indicado.
+    Las líneas que no son JSON (p.ej. logs en texto) se ignoran.
+    """
+    for path in paths:
+        with path.open("r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if (
+                    event.get("event") == "query"
+                    and event.get("store") == store_name
+                    and event.get("profile", "default") == profile
+                    and event.get("query")
+                ):
+                    yield event["query"]
+
+
+def top_queries(
+    queries: Iterable[str],
+    top: int,
+    min_count: int,
+) -> List[str]:
+    """
+    Agrupa por consulta normalizada y regresa, para las `top` más frecuentes,
+    la redacción original más común de cada grupo.
+    """
+    counts: Counter = Counter()
+    variants: Dict[str, Counter] = defaultdict(Counter)
+
+    for query in queries:
+        key = answer_key(query)
+        if not key:
+            continue
+        counts[key] += 1
+        variants[key][query.strip()] += 1
+
+    return [
+        variants[key].most_common(1)[0][0]
+        for key, n in counts.most_common(top)
+        if n >= min_count
+    ]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Precalcula respuestas para las consultas más frecuentes de un store."
+    )
+    parser.add_argument(
+        "--store-name",
+        required=True,
+        help="store_name sobre el que se consultará (el mismo que usa /query).",
+    )
+    parser.add_argument(
+        "--profile",
+        default="default",
+        help="Perfil de prompt (default: default).",
+    )
+    parser.add_argument(
+        "--log-file",
+        action="append",
+        default=[],
+        help="Log JSON de la API (se puede repetir).",
+    )
+    parser.add_argument(
+        "--queries-file",
+        help="Archivo de texto con una consulta por línea (alternativa a los logs).",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=200,
+        help="Número de consultas más frecuentes a precalcular (default: 200).",
+    )
+    parser.add_argument(
+        "--min-count",
+        type=int,
+        default=3,
+        help="Frecuencia mínima para incluir una consulta (default: 3).",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Llamadas simultáneas a Gemini (default: 4).",
+    )
+    args = parser.parse_args(argv)
+    setup_logging()
+
+    if not args.log_file and not args.queries_file:
+        raise SystemExit("Indica al menos un --log-file o --queries-file.")
+
+    queries: List[str] = list(
+        iter_logged_queries(
+            [Path(p) for p in args.log_file],
+            args.store_name,
+            args.profile,
+        )
+    )
+    if args.queries_file:
+        lines = Path(args.queries_file).read_text(encoding="utf-8").splitlines()
+        queries.extend(line for line in lines if line.strip())
+
+    selected = top_queries(queries, args.top, args.min_count)
+    if not selected:
+        raise SystemExit("No se encontraron consultas con la frecuencia mínima.")
+
+    print(
+        f"[+] {len(queries)} consultas leídas; precalculando las {len(selected)} "
+        f"más frecuentes para {args.store_name} / {args.profile}..."
+    )
+
+    store = AnswerStore(versions=StoreVersionRegistry())
+    path = store.build(
+        args.store_name,
+        args.profile,
+        selected,
+        GeminiService(),
+        PromptService(),
+        concurrency=args.concurrency,
+    )
+    print(f"[+] Answer store escrito en {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import cProfile
+import re
+import secrets
+import time
+from pathlib import Path
+from typing import List
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+
+from src.config import settings
+from src.utils.logger import logger
+from src.utils.profiler import (
+    profiling_lock,
+    sample_stacks,
+    write_collapsed,
+    write_pstats,
+)
+
+ADMIN_TOKEN_HEADER = "x-admin-token"
+PROFILE_HEADER = "x-profile"
+
+_PROFILE_NAME_RE = re.compile(r"^[A-Za-z0-9._\-]+\.(pstats|collapsed)$")
+
+
+def _profiles_dir() -> Path:
+    return Path(settings.PROFILING_OUTPUT_DIR)
+
+
+def is_admin_token(token: str | None) -> bool:
+    expected = settings.PROFILING_ADMIN_TOKEN
+    if not (token and expected):
+        return False
+    # Comparamos bytes: compare_digest levanta TypeError con str no ASCII
+    return secrets.compare_digest(token.encode("utf-8"), expected.encode("utf-8"))
+
+
+def require_admin(x_admin_token: str | None = Header(None)) -> None:
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Token de administrador inválido")
+
+
+admin_router = APIRouter(
+    prefix="/admin/profiling",
+    dependencies=[Depends(require_admin)],
+)
+
+
+@admin_router.post("/sample")
+async def sample_worker(
+    seconds: float = Query(10, gt=0),
+    # Intervalos menores a 1 ms mantienen al hilo muestreador ocupado con el GIL
+    interval_ms: float = Query(5, ge=1),
+):
+    """
+    Perfil por muestreo de este worker durante `seconds` (acotado por
+    PROFILING_MAX_SAMPLE_SECONDS). Devuelve los stacks en formato collapsed.
+    """
+    seconds = min(seconds, settings.PROFILING_MAX_SAMPLE_SECONDS)
+
+    if not profiling_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="Ya hay un perfil en curso")
+    try:
+        logger.info("Perfil por muestreo iniciado: {}s cada {} ms", seconds, interval_ms)
+        counts = await run_in_threadpool(sample_stacks, seconds, interval_ms / 1000)
+    finally:
+        profiling_lock.release()
+
+    name = f"sample-{time.strftime('%Y%m%d-%H%M%S')}.collapsed"
+    path = _profiles_dir() / name
+    write_collapsed(counts, path)
+
+    return FileResponse(path, media_type="text/plain", filename=name)
+
+
+@admin_router.get("/profiles")
+def list_profiles() -> List[str]:
+    directory = _profiles_dir()
+    if not directory.exists():
+        return []
+    return sorted(p.name for p in directory.iterdir() if _PROFILE_NAME_RE.match(p.name))
+
+
+@admin_router.get("/profiles/{name}")
+def download_profile(name: str):
+    if not _PROFILE_NAME_RE.match(name):
+        raise HTTPException(status_code=400, detail="Nombre de perfil inválido")
+
+    path = _profiles_dir() / name
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
+
+
+class RequestProfilingMiddleware:
+    """
+    Perfila con cProfile un request individual cuando trae `X-Profile: 1` y un
+    `X-Admin-Token` válido. El dump pstats queda en PROFILING_OUTPUT_DIR y su
+    nombre se regresa en el header `X-Profile-Id`.
+
+    cProfile solo ve el hilo del event loop: el trabajo enviado al threadpool
+    no aparece, y si hay otros requests concurrentes también se contabilizan.
+    Solo se instala con PROFILING_ENABLED=true (sin costo cuando está apagado).
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if headers.get(PROFILE_HEADER.encode()) != b"1" or not is_admin_token(
+            headers.get(ADMIN_TOKEN_HEADER.encode(), b"").decode("latin-1")
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if not profiling_lock.acquire(blocking=False):
+            logger.warning("Perfil de request omitido: ya hay un perfil en curso")
+            await self.app(scope, receive, send)
+            return
+
+        request_id = scope.get("state", {}).get("request_id") or secrets.token_hex(8)
+        name = f"request-{request_id}.pstats"
+
+        async def send_with_profile_id(message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", name.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_with_profile_id)
+            finally:
+                profiler.disable()
+            write_pstats(profiler, _profiles_dir() / name)
+            logger.info("Perfil de request guardado: {}", name)
+        finally:
+            profiling_lock.release()
@@ -0,0 +1,241 @@
+import asyncio
+import math
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from src.config import settings
+from src.utils.logger import logger
+
+# Prefijo de ruta (POST) -> ruta controlada
+ADMITTED_PATHS: Dict[str, str] = {
+    "/query/": "query",
+    "/upload-files/": "upload",
+}
+
+
+@dataclass
+class RouteLimits:
+    max_inflight: int
+    max_queue: int
+    # Menor número = mayor prioridad (consultas interactivas antes que ingesta)
+    priority: int
+
+
+class AdmissionController:
+    """
+    Control de admisión para rutas costosas.
+
+    - Cada ruta tiene un máximo de peticiones en vuelo y en cola; además hay
+      un máximo global compartido.
+    - Al exceder la cola se rechaza de inmediato con 503 + Retry-After en
+      lugar de acumular trabajo que el cliente ya abandonó.
+    - La cola es justa por consumidor (round-robin entre tenants) y las rutas
+      de mayor prioridad se despachan primero cuando se libera capacidad.
+    """
+
+    def __init__(
+        self,
+        routes: Dict[str, RouteLimits],
+        max_inflight_total: int,
+        queue_timeout_seconds: float,
+        retry_after_seconds: float,
+        enabled: bool = True,
+    ) -> None:
+        self.routes = routes
+        self.max_inflight_total = max_inflight_total
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.enabled = enabled
+
+        self._inflight: Dict[str, int] = {route: 0 for route in routes}
+        self._queued: Dict[str, int] = {route: 0 for route in routes}
+        # route -> consumer -> cola FIFO de futures (orden del dict = round-robin)
+        self._waiters: Dict[str, "OrderedDict[str, Deque[asyncio.Future]]"] = {
+            route: OrderedDict() for route in routes
+        }
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        return cls(
+            routes={
+                "query": RouteLimits(
+                    max_inflight=settings.ADMISSION_QUERY_MAX_INFLIGHT,
+                    max_queue=settings.ADMISSION_QUERY_MAX_QUEUE,
+                    priority=0,
+                ),
+                "upload": RouteLimits(
+                    max_inflight=settings.ADMISSION_UPLOAD_MAX_INFLIGHT,
+                    max_queue=settings.ADMISSION_UPLOAD_MAX_QUEUE,
+                    priority=1,
+                ),
+            },
+            max_inflight_total=settings.ADMISSION_MAX_INFLIGHT_TOTAL,
+            queue_timeout_seconds=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+            retry_after_seconds=settings.ADMISSION_RETRY_AFTER_SECONDS,
+            enabled=settings.ADMISSION_ENABLED,
+        )
+
+    # --------- ESTADO --------- #
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            route: {"inflight": self._inflight[route], "queued": self._queued[route]}
+            for route in self.routes
+        }
+
+    def _reject(self, route: str, reason: str) -> HTTPException:
+        logger.warning("Admisión rechazada en '{}': {} | {}", route, reason, self.stats())
+        return HTTPException(
+            status_code=503,
+            detail=f"Servicio saturado ({reason}). Intenta más tarde.",
+            headers={"Retry-After": str(math.ceil(self.retry_after_seconds))},
+        )
+
+    # --------- DESPACHO --------- #
+
+    def _dispatch(self) -> None:
+        """
+        Asigna capacidad libre a los waiters: primero por prioridad de ruta,
+        luego round-robin entre consumidores de esa ruta.
+        """
+        by_priority = sorted(self.routes, key=lambda r: self.routes[r].priority)
+
+        while sum(self._inflight.values()) < self.max_inflight_total:
+            for route in by_priority:
+                waiters = self._waiters[route]
+                if waiters and self._inflight[route] < self.routes[route].max_inflight:
+                    break
+            else:
+                return
+
+            consumer, queue = waiters.popitem(last=False)
+            future = queue.popleft()
+            if queue:
+                # El consumidor va al final de la ronda
+                waiters[consumer] = queue
+
+            self._queued[route] -= 1
+            self._inflight[route] += 1
+            future.set_result(None)
+
+    async def acquire(self, route: str, consumer: str) -> None:
+        if not self.enabled:
+            return
+
+        # Con capacidad libre y nadie esperando en la ruta se admite sin encolar
+        # (max_queue=0 significa "nunca esperar", no "rechazar todo")
+        if (
+            not self._waiters[route]
+            and self._inflight[route] < self.routes[route].max_inflight
+            and sum(self._inflight.values()) < self.max_inflight_total
+        ):
+            self._inflight[route] += 1
+            return
+
+        if self._queued[route] >= self.routes[route].max_queue:
+            raise self._reject(route, "cola llena")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[route].setdefault(consumer, deque()).append(future)
+        self._queued[route] += 1
+        self._dispatch()
+
+        if future.done():
+            return
+
+        try:
+            await asyncio.wait({future}, timeout=self.queue_timeout_seconds)
+        except asyncio.CancelledError:
+            if future.done():
+                self.release(route)
+            else:
+                self._remove_waiter(route, consumer, future)
+            raise
+
+        if future.done():
+            return
+
+        self._remove_waiter(route, consumer, future)
+        raise self._reject(route, "tiempo de espera en cola agotado")
+
+    def _remove_waiter(self, route: str, consumer: str, future: asyncio.Future) -> None:
+        """
+        Retira un waiter que ya no espera (timeout o cancelación).
+        """
+        future.cancel()
+        queue = self._waiters[route].get(consumer)
+        if queue is not None:
+            queue.remove(future)
+            if not queue:
+                del self._waiters[route][consumer]
+        self._queued[route] -= 1
+
+    def release(self, route: str) -> None:
+        if not self.enabled:
+            return
+        self._inflight[route] -= 1
+        self._dispatch()
+
+
+def consumer_key(request: Request) -> str:
+    """
+    Identifica al consumidor de la API para la cola justa: header de tenant
+    o, si no viene, la IP del cliente.
+    """
+    tenant = request.headers.get(settings.ADMISSION_CONSUMER_HEADER)
+    if tenant:
+        return tenant
+    return request.client.host if request.client else "anonymous"
+
+
+class AdmissionMiddleware:
+    """
+    Middleware ASGI que reserva un lugar en el AdmissionController antes de
+    que la ruta lea el body. Como dependencia de FastAPI llegaba tarde: el
+    multipart de /upload-files se recibe completo antes de resolver
+    dependencias, así que la carga se rechazaba después de haberla aceptado.
+    """
+
+    def __init__(
+        self,
+        app,
+        controller: AdmissionController,
+        paths: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.app = app
+        self.controller = controller
+        self.paths = paths or ADMITTED_PATHS
+
+    def _route_for(self, scope) -> Optional[str]:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            return None
+        for prefix, route in self.paths.items():
+            if scope["path"].startswith(prefix):
+                return route
+        return None
+
+    async def __call__(self, scope, receive, send) -> None:
+        route = self._route_for(scope)
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(route, consumer_key(Request(scope)))
+        except HTTPException as exc:
+            response = JSONResponse(
+                {"detail": exc.detail},
+                status_code=exc.status_code,
+                headers=exc.headers,
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route)
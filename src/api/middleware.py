@@ -0,0 +1,62 @@
+import re
+import time
+import uuid
+
+from src.utils.logger import logger, sampled_logger
+
+REQUEST_ID_HEADER = "x-request-id"
+
+# Solo aceptamos IDs de cliente "razonables" para no contaminar los logs
+_VALID_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._\-]{1,64}$")
+
+
+class RequestContextMiddleware:
+    """
+    Middleware ASGI que asigna un request_id (el del header X-Request-ID o uno
+    nuevo), lo agrega al contexto de loguru para que todos los logs de rutas y
+    servicios lo incluyan, y lo regresa en la respuesta.
+
+    Es ASGI puro (no BaseHTTPMiddleware) para no añadir overhead por request.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                candidate = value.decode("latin-1")
+                if _VALID_REQUEST_ID_RE.match(candidate):
+                    request_id = candidate
+                break
+        if request_id is None:
+            request_id = uuid.uuid4().hex
+
+        scope.setdefault("state", {})["request_id"] = request_id
+        status = {"code": 500}
+        start = time.perf_counter()
+
+        async def send_with_request_id(message) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER.encode(), request_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        with logger.contextualize(request_id=request_id):
+            try:
+                await self.app(scope, receive, send_with_request_id)
+            finally:
+                sampled_logger.info(
+                    "{} {} -> {} ({:.1f} ms)",
+                    scope["method"],
+                    scope["path"],
+                    status["code"],
+                    (time.perf_counter() - start) * 1000,
+                )
@@ -0,0 +1,124 @@
+import gzip
+import hashlib
+from typing import Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from src.config import settings
+from src.utils.text_utils import normalize_query
+
+try:  # brotli es opcional: sin él se negocia solo gzip
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _accepted_encodings(accept_encoding: str) -> dict:
+    """
+    "gzip, br;q=0.8, *;q=0" -> {"gzip": 1.0, "br": 0.8, "*": 0.0}
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+def compress(body: bytes, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+    """
+    Comprime `body` con el mejor encoding aceptado por el cliente (br > gzip).
+    Cuerpos pequeños se envían sin comprimir.
+    """
+    if len(body) < settings.RESPONSE_COMPRESSION_MIN_BYTES or not accept_encoding:
+        return body, None
+
+    accepted = _accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return brotli.compress(body, quality=BROTLI_QUALITY), "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), "gzip"
+    return body, None
+
+
+def compute_etag(
+    store_version: str,
+    profile_fingerprint: str,
+    store_name: str,
+    profile: str,
+    query: str,
+    compact: bool,
+) -> str:
+    """
+    ETag estable de una respuesta de /query: depende de la versión de los
+    documentos del store, la configuración del perfil (prompt y modelos), la
+    consulta normalizada y el formato.
+    Es débil (W/) porque la misma respuesta puede ir en distintos encodings.
+    """
+    raw = "\x1f".join(
+        [
+            store_version,
+            profile_fingerprint,
+            store_name,
+            profile,
+            normalize_query(query),
+            str(int(compact)),
+        ]
+    )
+    return f'W/"{hashlib.blake2b(raw.encode("utf-8"), digest_size=12).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+
+    # "*" no aplica: /query es un POST y siempre "existe" una respuesta, así
+    # que se trata como un tag más (nunca coincide) y la consulta se responde
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Vary": "Accept-Encoding"},
+    )
+
+
+def model_response(
+    request: Request,
+    model: BaseModel,
+    compact: bool = False,
+    etag: Optional[str] = None,
+) -> Response:
+    """
+    Respuesta JSON rápida: serializa directo con pydantic-core (sin pasar por
+    jsonable_encoder) y comprime según Accept-Encoding.
+
+    compact=True omite campos con su valor por defecto (page=None, snippet="").
+    """
+    body = model.model_dump_json(exclude_defaults=compact).encode("utf-8")
+    body, encoding = compress(body, request.headers.get("accept-encoding", ""))
+
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    if etag:
+        headers["ETag"] = etag
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,5 +1,9 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
-from typing import List
+import asyncio
+import time
+from typing import Any, Awaitable, List, Optional
+
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
 
 from src.models.schemas import (
     UploadResponse,
@@ -7,11 +11,19 @@ from src.models.schemas import (
     QueryResponse,
     Source,
 )
+from src.api.admission import AdmissionController
+from src.api.responses import compute_etag, etag_matches, model_response, not_modified
+from src.config import settings
 from src.services.gemini_service import GeminiService
+from src.services.answer_store import AnswerStore
 from src.services.file_service import FileService
-from src.services.prompt_service import PromptService
-from src.utils.exceptions import GeminiServiceError
-from src.utils.logger import logger
+from src.services.prompt_service import ModelTier, PromptService
+from src.services.query_cache import SimilarityQueryCache
+from src.services.router_service import QueryRouterService
+from src.services.session_service import SessionStore
+from src.services.store_versions import StoreVersionRegistry
+from src.utils.exceptions import GeminiServiceError, GeminiTimeoutError
+from src.utils.logger import logger, sampled_logger
 from src.utils.gemini_utils import extract_sources_from_grounding
 
 router = APIRouter()
@@ -21,7 +33,23 @@ router = APIRouter()
 
 _gemini_service = GeminiService()
 _prompt_service = PromptService()
-_file_service = FileService(_gemini_service)
+_router_service = QueryRouterService()
+_query_cache = SimilarityQueryCache()
+_store_versions = StoreVersionRegistry()
+_answer_store = AnswerStore(versions=_store_versions)
+if settings.ANSWER_STORE_ENABLED:
+    _answer_store.load_all()
+_session_store = SessionStore()
+_admission = AdmissionController.from_settings()
+_file_service = FileService(
+    _gemini_service,
+    upload_listeners=[
+        _store_versions.on_files_uploaded,
+        _router_service.on_files_uploaded,
+        _query_cache.on_files_uploaded,
+        _answer_store.make_upload_listener(_gemini_service, _prompt_service),
+    ],
+)
 
 
 def get_gemini_service() -> GeminiService:
@@ -36,6 +64,218 @@ def get_file_service() -> FileService:
     return _file_service
 
 
+def get_router_service() -> QueryRouterService:
+    return _router_service
+
+
+def get_query_cache() -> SimilarityQueryCache:
+    return _query_cache
+
+
+def get_answer_store() -> AnswerStore:
+    return _answer_store
+
+
+def get_session_store() -> SessionStore:
+    return _session_store
+
+
+def get_store_versions() -> StoreVersionRegistry:
+    return _store_versions
+
+
+def get_admission_controller() -> AdmissionController:
+    return _admission
+
+
+# Cada cuánto revisamos si el cliente sigue conectado (segundos)
+DISCONNECT_POLL_INTERVAL_SEC = 0.5
+
+
+def _resolve_deadline(body: QueryRequest) -> float:
+    """
+    Deadline efectivo: el del cliente (acotado) o el configurado por defecto.
+    """
+    if body.timeout_seconds is None:
+        return settings.QUERY_DEADLINE_SECONDS
+    return min(body.timeout_seconds, settings.QUERY_DEADLINE_MAX_SECONDS)
+
+
+async def _cancel_on_disconnect(request: Request, awaitable: Awaitable[Any]) -> Any:
+    """
+    Ejecuta `awaitable` y lo cancela si el cliente cierra la conexión.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL_SEC)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info("Cliente desconectado; cancelando llamada a Gemini")
+                task.cancel()
+                # 499: convención de nginx para "client closed request"
+                raise HTTPException(status_code=499, detail="Cliente desconectado")
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def _query_etag(
+    store_versions: StoreVersionRegistry,
+    prompt_service: PromptService,
+    store_name: str,
+    body: QueryRequest,
+    compact: bool,
+) -> Optional[str]:
+    """
+    ETag de la respuesta; None en sesiones (la respuesta depende del historial).
+    """
+    if body.session_id:
+        return None
+    return compute_etag(
+        store_versions.get(store_name),
+        prompt_service.profile_fingerprint(body.prompt_profile),
+        store_name,
+        body.prompt_profile,
+        body.query,
+        compact,
+    )
+
+
+async def _run_query(
+    request: Request,
+    store_name: str,
+    body: QueryRequest,
+    gemini_service: GeminiService,
+    prompt_service: PromptService,
+    router_service: QueryRouterService,
+    query_cache: SimilarityQueryCache,
+    session_store: SessionStore,
+    answer_store: AnswerStore,
+) -> QueryResponse:
+    """
+    Flujo común de consulta RAG: respuestas precalculadas -> caché -> prompt ->
+    ruteo de store -> Gemini (con cascade de modelos) -> fuentes.
+    """
+    deadline = time.monotonic() + _resolve_deadline(body)
+
+    # Evento 'query' para minar consultas frecuentes (scripts/build_answer_store.py).
+    # Opt-in (contiene el texto del usuario) y solo en JSON, único formato que
+    # conserva los campos que lee el script
+    if settings.QUERY_LOG_ENABLED and settings.LOG_FORMAT == "json":
+        logger.bind(
+            event="query",
+            store=store_name,
+            profile=body.prompt_profile,
+            query=body.query,
+        ).info("Consulta recibida")
+
+    # ---- Historial de la sesión (si la hay) ---- #
+    history: List[dict] = []
+    summary = ""
+    if body.session_id:
+        history, summary = session_store.get_history(body.session_id)
+
+    # Con historial la respuesta depende del contexto: no se usan cachés
+    contextual = bool(history or summary)
+    use_cache = settings.QUERY_CACHE_ENABLED and not contextual
+
+    # ---- Consultas frecuentes: respuesta precalculada ---- #
+    precomputed = None
+    if settings.ANSWER_STORE_ENABLED and not contextual:
+        precomputed = answer_store.get(store_name, body.prompt_profile, body.query)
+
+    # ---- Consultas casi duplicadas se responden desde caché ---- #
+    if precomputed is None and use_cache:
+        cached = query_cache.get(store_name, body.prompt_profile, body.query)
+        if cached is not None:
+            precomputed = (cached.answer, cached.sources)
+
+    if precomputed is not None:
+        answer_text, sources = precomputed
+        if body.session_id:
+            session_store.append_exchange(body.session_id, body.query, answer_text)
+        return QueryResponse(
+            answer=answer_text,
+            sources=sources,
+            session_id=body.session_id,
+        )
+
+    system_instruction, generation = prompt_service.get_profile_settings(
+        profile=body.prompt_profile
+    )
+    if summary:
+        system_instruction += f"\n\nResumen de la conversación previa:\n{summary}"
+
+    # ---- Ruteo opcional General -> store(s) más angosto(s) ---- #
+    store_names = router_service.resolve_stores(store_name, body.query)
+
+    # ---- Cascade: tier barato primero; se escala si no hay fuentes ---- #
+    tiers: List[ModelTier] = [generation.primary]
+    if generation.use_cascade(body.query):
+        tiers.insert(0, generation.cascade)
+
+    for tier in tiers:
+        # El deadline es de la petición completa, no de cada tier
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise HTTPException(status_code=504, detail="Deadline de la consulta agotado")
+
+        try:
+            raw_response = await _cancel_on_disconnect(
+                request,
+                gemini_service.aquery_with_rag(
+                    store_name=store_names,
+                    query=body.query,
+                    system_instruction=system_instruction,
+                    generation_config=tier.generation_config,
+                    deadline_seconds=remaining,
+                    model=tier.model,
+                    history=history,
+                ),
+            )
+        except GeminiTimeoutError as exc:
+            raise HTTPException(status_code=504, detail=str(exc)) from exc
+        except GeminiServiceError as exc:
+            if tier is generation.primary:
+                raise HTTPException(status_code=500, detail=str(exc)) from exc
+            # El tier barato es best-effort: cualquier falla escala al principal
+            logger.warning(
+                "Cascade: falló el modelo {} ({}); escalando al tier principal",
+                tier.model,
+                exc,
+            )
+            continue
+
+        # ---- Texto principal de la respuesta ---- #
+        answer_text = getattr(raw_response, "text", "") or ""
+
+        # ---- Fuentes desde grounding_metadata (File Search) ---- #
+        sources: List[Source] = extract_sources_from_grounding(raw_response)
+
+        if sources or tier is generation.primary:
+            break
+        sampled_logger.info(
+            "Cascade: el modelo {} no devolvió fuentes; escalando al tier principal",
+            tier.model,
+        )
+
+    if use_cache:
+        query_cache.put(
+            store_name, body.prompt_profile, body.query, answer_text, sources
+        )
+
+    if body.session_id:
+        session_store.append_exchange(body.session_id, body.query, answer_text)
+
+    return QueryResponse(
+        answer=answer_text,
+        sources=sources,
+        session_id=body.session_id,
+    )
+
+
 # ------------------- ENDPOINTS ------------------- #
 
 @router.get("/health")
@@ -65,71 +305,63 @@ def create_store(
     response_model=UploadResponse,
 )
 async def upload_files(
+    request: Request,
     store_name: str,
     files: List[UploadFile] = File(...),
+    compact: bool = Query(False, description="Omite campos vacíos en la respuesta."),
     file_service: FileService = Depends(get_file_service),
 ):
     """
     Recibe múltiples archivos, los valida con el módulo de limpieza
     y sube los que pasen el filtro.
     """
-    # Nota: FileService es síncrono; FastAPI permite llamarlo así
-    resp = file_service.process_and_upload(store_name=store_name, files=files)
-    return resp
+    # FileService es síncrono (espera el indexado): lo sacamos del event loop
+    # para no bloquear las consultas mientras dura la ingesta
+    resp = await run_in_threadpool(
+        file_service.process_and_upload, store_name=store_name, files=files
+    )
+    return model_response(request, resp, compact=compact)
 
 
-@router.post("/query/{store_name:path}", response_model=QueryResponse)
+@router.post(
+    "/query/{store_name:path}",
+    response_model=QueryResponse,
+)
 async def query_store(
+    request: Request,
     store_name: str,
     body: QueryRequest,
+    compact: bool = Query(False, description="Omite campos vacíos en la respuesta."),
     gemini_service: GeminiService = Depends(get_gemini_service),
     prompt_service: PromptService = Depends(get_prompt_service),
+    router_service: QueryRouterService = Depends(get_router_service),
+    query_cache: SimilarityQueryCache = Depends(get_query_cache),
+    session_store: SessionStore = Depends(get_session_store),
+    answer_store: AnswerStore = Depends(get_answer_store),
+    store_versions: StoreVersionRegistry = Depends(get_store_versions),
 ):
     """
     Realiza una consulta RAG sobre un File Search store.
+    Soporta If-None-Match (304), compresión gzip/br y modo compacto.
     """
-    _, system_instruction = prompt_service.get_system_instruction(
-        profile=body.prompt_profile
-    )
-
-    try:
-        raw_response = gemini_service.query_with_rag(
-            store_name=store_name,
-            query=body.query,
-            system_instruction=system_instruction,
-        )
-    except GeminiServiceError as exc:
-        raise HTTPException(status_code=500, detail=str(exc)) from exc
-
-    # ---- Texto principal de la respuesta ---- #
-    answer_text = getattr(raw_response, "text", "") or ""
-
-    # ---- Fuentes desde grounding_metadata (File Search) ---- #
-    sources: List[Source] = extract_sources_from_grounding(raw_response)
+    # "/query/" también cae en esta ruta, con store_name vacío
+    if not store_name:
+        raise HTTPException(status_code=400, detail="store_name es requerido")
 
-    return QueryResponse(answer=answer_text, sources=sources)
+    etag = _query_etag(store_versions, prompt_service, store_name, body, compact)
+    if etag and etag_matches(request, etag):
+        return not_modified(etag)
 
-
-@router.post("/query/")
-async def query_endpoint(req: QueryRequest):
-    gemini_service = GeminiService()
-    prompt_service = PromptService()
-    _, system_instruction = prompt_service.get_system_instruction(
-        profile=req.prompt_profile
+    resp = await _run_query(
+        request,
+        store_name,
+        body,
+        gemini_service,
+        prompt_service,
+        router_service,
+        query_cache,
+        session_store,
+        answer_store,
     )
-    try:
-        raw_response = gemini_service.query_with_rag(
-            store_name=req.topic,
-            query=req.query,
-            system_instruction=system_instruction,
-        )
-    except GeminiServiceError as exc:
-        raise HTTPException(status_code=500, detail=str(exc)) from exc
-
-    # ---- Texto principal de la respuesta ---- #
-    answer_text = getattr(raw_response, "text", "") or ""
-
-    # ---- Fuentes desde grounding_metadata (File Search) ---- #
-    sources: List[Source] = extract_sources_from_grounding(raw_response)
+    return model_response(request, resp, compact=compact, etag=etag)
 
-    return QueryResponse(answer=answer_text, sources=sources)
@@ -23,6 +23,214 @@ class Settings(BaseSettings):
         description="Modelo por defecto para consultas RAG con File Search.",
     )
 
+    # Router local de consultas (General -> leyes / tramites)
+    QUERY_ROUTER_ENABLED: bool = Field(
+        False,
+        description="Activa el ruteo de consultas del store General a stores más angostos.",
+    )
+    QUERY_ROUTER_MIN_SCORE: float = Field(
+        0.15,
+        description="Similitud mínima (coseno TF-IDF) para elegir un store angosto.",
+    )
+    QUERY_ROUTER_BOTH_RATIO: float = Field(
+        0.7,
+        description="Un segundo store se incluye si su score es >= ratio * score del mejor.",
+    )
+    QUERY_ROUTER_CONFIG_PATH: str = Field(
+        "prompts/router_config.yaml",
+        description="Keywords semilla por label del router.",
+    )
+    QUERY_ROUTER_INDEX_PATH: str = Field(
+        "data/router_index.json",
+        description="Términos de los documentos ingeridos que alimentan el router (persistidos).",
+    )
+    QUERY_ROUTER_MAX_DOCS_PER_LABEL: int = Field(
+        500,
+        description="Documentos ingeridos que conserva el router por label (los más recientes).",
+    )
+
+    # Caché de consultas casi duplicadas (n-gramas hasheados)
+    QUERY_CACHE_ENABLED: bool = Field(
+        True,
+        description="Responde consultas casi duplicadas desde caché sin llamar a Gemini.",
+    )
+    QUERY_CACHE_THRESHOLD: float = Field(
+        0.85,
+        description="Similitud coseno mínima para considerar dos consultas equivalentes.",
+    )
+    QUERY_CACHE_DIM: int = Field(
+        1024,
+        description="Dimensión del embedding de n-gramas hasheados.",
+    )
+    QUERY_CACHE_MAX_ENTRIES: int = Field(
+        500,
+        description="Máximo de consultas cacheadas por (store, perfil).",
+    )
+    QUERY_CACHE_MAX_BUCKETS: int = Field(
+        16,
+        description="Máximo de pares (store, perfil) en memoria.",
+    )
+    QUERY_CACHE_TTL_SECONDS: float = Field(
+        24 * 3600,
+        description="Vida máxima de una respuesta cacheada (0 = sin expiración).",
+    )
+
+    # Deadlines, hedging y cuota de llamadas a Gemini
+    QUERY_DEADLINE_SECONDS: float = Field(
+        60,
+        description="Deadline por defecto de una consulta RAG (segundos).",
+    )
+    QUERY_DEADLINE_MAX_SECONDS: float = Field(
+        120,
+        description="Máximo deadline que un cliente puede solicitar con timeout_seconds.",
+    )
+    QUERY_HEDGE_ENABLED: bool = Field(
+        False,
+        description="Lanza una segunda llamada idéntica si la primera excede el percentil observado.",
+    )
+    QUERY_HEDGE_PERCENTILE: float = Field(
+        95,
+        description="Percentil de latencia a partir del cual se lanza la llamada de cobertura.",
+    )
+    QUERY_HEDGE_MIN_SAMPLES: int = Field(
+        20,
+        description="Muestras de latencia necesarias antes de activar hedging.",
+    )
+    QUERY_HEDGE_MAX_RATIO: float = Field(
+        0.05,
+        description="Fracción máxima de llamadas a Gemini que pueden lanzar cobertura.",
+    )
+    GEMINI_RATE_LIMIT_RPM: float = Field(
+        0,
+        description="Máximo de llamadas generate_content por minuto (0 = sin límite).",
+    )
+    GEMINI_RATE_LIMIT_BURST: int | None = Field(
+        None,
+        description="Ráfaga máxima del rate limiter (default: RPM / 10).",
+    )
+
+    # Sesiones conversacionales
+    SESSION_HISTORY_TOKEN_BUDGET: int = Field(
+        2000,
+        description="Tokens máximos de historial (turnos + resumen) enviados por sesión.",
+    )
+    SESSION_MAX_SESSIONS: int = Field(
+        5000,
+        description="Máximo de sesiones en memoria (se desalojan por LRU).",
+    )
+    SESSION_TTL_SECONDS: float = Field(
+        1800,
+        description="Inactividad tras la cual expira una sesión (0 = sin expiración).",
+    )
+
+    # Control de admisión / load shedding para /query y /upload-files
+    ADMISSION_ENABLED: bool = Field(
+        True,
+        description="Activa el control de admisión en rutas costosas.",
+    )
+    ADMISSION_MAX_INFLIGHT_TOTAL: int = Field(
+        64,
+        description="Peticiones en vuelo máximas sumando todas las rutas controladas.",
+    )
+    ADMISSION_QUERY_MAX_INFLIGHT: int = Field(
+        48,
+        description="Consultas /query en vuelo máximas.",
+    )
+    ADMISSION_QUERY_MAX_QUEUE: int = Field(
+        64,
+        description="Consultas /query en cola máximas antes de responder 503.",
+    )
+    ADMISSION_UPLOAD_MAX_INFLIGHT: int = Field(
+        2,
+        description="Peticiones /upload-files en vuelo máximas.",
+    )
+    ADMISSION_UPLOAD_MAX_QUEUE: int = Field(
+        4,
+        description="Peticiones /upload-files en cola máximas antes de responder 503.",
+    )
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = Field(
+        10,
+        description="Tiempo máximo de espera en cola antes de responder 503.",
+    )
+    ADMISSION_RETRY_AFTER_SECONDS: float = Field(
+        5,
+        description="Valor del header Retry-After en respuestas 503.",
+    )
+    ADMISSION_CONSUMER_HEADER: str = Field(
+        "X-Tenant-ID",
+        description="Header que identifica al consumidor para la cola justa (fallback: IP).",
+    )
+
+    # Logging
+    LOG_LEVEL: str = Field(
+        "INFO",
+        description="Nivel de log por defecto.",
+    )
+    LOG_FORMAT: str = Field(
+        "text",
+        description="Formato de logs: text | json (una línea JSON por evento).",
+    )
+    LOG_MODULE_LEVELS: str = Field(
+        "",
+        description="Niveles por módulo, p.ej. 'src.utils.gemini_utils=WARNING,src.services=DEBUG'.",
+    )
+    LOG_SAMPLE_RATE: float = Field(
+        1.0,
+        description="Fracción de eventos INFO de alto volumen que se emiten (0-1).",
+    )
+    LOG_ENQUEUE: bool = Field(
+        False,
+        description="Escribe logs desde un hilo aparte (útil si stdout es lento; "
+        "medir con scripts/bench_logging.py).",
+    )
+
+    # Profiling bajo demanda (solo admins)
+    PROFILING_ENABLED: bool = Field(
+        False,
+        description="Instala el middleware y los endpoints /admin/profiling.",
+    )
+    PROFILING_ADMIN_TOKEN: str | None = Field(
+        None,
+        description="Token requerido en el header X-Admin-Token para perfilar.",
+    )
+    PROFILING_OUTPUT_DIR: str = Field(
+        "data/profiles",
+        description="Carpeta donde se guardan los dumps pstats / collapsed.",
+    )
+    PROFILING_MAX_SAMPLE_SECONDS: float = Field(
+        60,
+        description="Duración máxima de un perfil por muestreo.",
+    )
+
+    # Respuestas precalculadas para consultas frecuentes
+    ANSWER_STORE_ENABLED: bool = Field(
+        True,
+        description="Sirve consultas frecuentes desde el answer store precalculado.",
+    )
+    ANSWER_STORE_DIR: str = Field(
+        "data/answer_store",
+        description="Carpeta del answer store (generado por scripts/build_answer_store.py).",
+    )
+    ANSWER_STORE_AUTO_REBUILD: bool = Field(
+        True,
+        description="Reconstruye el answer store de un store tras subir documentos.",
+    )
+    QUERY_LOG_ENABLED: bool = Field(
+        False,
+        description="Registra cada consulta (evento 'query', con el texto del usuario) para "
+        "minar las más frecuentes. Solo aplica con LOG_FORMAT=json.",
+    )
+
+    # Respuestas HTTP
+    RESPONSE_COMPRESSION_MIN_BYTES: int = Field(
+        500,
+        description="Tamaño mínimo del cuerpo para comprimir con gzip/br.",
+    )
+    STORE_VERSIONS_PATH: str = Field(
+        "data/store_versions.json",
+        description="Versiones de documentos por store (base de los ETags de /query).",
+    )
+
     APP_ENV: str = Field(
         "dev",
         description="Entorno de ejecución: dev | staging | prod",
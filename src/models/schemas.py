@@ -1,5 +1,5 @@
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class DiscardedFile(BaseModel):
@@ -17,14 +17,19 @@ class UploadResponse(BaseModel):
 class Source(BaseModel):
     filename: str
     page: Optional[int] = None
-    snippet: str
+    snippet: str = ""
 
 
 class QueryRequest(BaseModel):
     query: str
     prompt_profile: str = "default"
+    # Deadline solicitado por el cliente; se acota a QUERY_DEADLINE_MAX_SECONDS
+    timeout_seconds: Optional[float] = Field(None, gt=0)
+    # Conversación multi-turno: el historial se guarda del lado del servidor
+    session_id: Optional[str] = Field(None, min_length=1, max_length=128)
 
 
 class QueryResponse(BaseModel):
     answer: str
     sources: List[Source]
+    session_id: Optional[str] = None
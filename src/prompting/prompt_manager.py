@@ -66,13 +66,17 @@ def _read_file(path_str: str) -> str:
 # -------------------------------------------------------------------------
 # ⚙️ API PRINCIPAL USADA POR prompt_service: load_prompt(profile)
 # -------------------------------------------------------------------------
-def load_prompt(profile: str) -> Dict[str, str]:
+def load_prompt(profile: str) -> Dict[str, Any]:
     """
     Carga el prompt según el perfil indicado.
 
     Devuelve un dict con al menos:
       - system_instruction: texto de instrucciones de sistema
       - context_template: plantilla donde se insertará el contexto ({{context}})
+      - model: modelo del perfil (None = GEMINI_MODEL)
+      - generation_config: dict de parámetros de generación del perfil
+      - cascade: dict con el tier barato para consultas simples (o vacío)
+      - source_files: rutas leídas (config + prompts), para detectar cambios
 
     Esto mantiene compatibilidad con el import:
       from src.prompting.prompt_manager import load_prompt
@@ -86,6 +90,7 @@ def load_prompt(profile: str) -> Dict[str, str]:
     if isinstance(profile_cfg, str):
         system_instruction_file = profile_cfg
         context_template_file = None
+        profile_cfg = {}
     elif isinstance(profile_cfg, dict):
         system_instruction_file = profile_cfg.get("system_instruction_file")
         context_template_file = profile_cfg.get("context_template_file")
@@ -110,6 +115,12 @@ def load_prompt(profile: str) -> Dict[str, str]:
     return {
         "system_instruction": system_instruction,
         "context_template": context_template,
+        "model": profile_cfg.get("model"),
+        "generation_config": profile_cfg.get("generation_config") or {},
+        "cascade": profile_cfg.get("cascade") or {},
+        "source_files": [
+            str(p) for p in (PROMPT_CONFIG_PATH, system_instruction_file, context_template_file) if p
+        ],
     }
 
 
@@ -126,7 +137,7 @@ class PromptManager:
         self.config_path = Path(config_path)
         self.config = _load_config()
 
-    def get_prompt(self, profile: str) -> Dict[str, str]:
+    def get_prompt(self, profile: str) -> Dict[str, Any]:
         """
         Devuelve el mismo dict que load_prompt(profile).
         """
@@ -0,0 +1,412 @@
+import hashlib
+import json
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.config import settings
+from src.models.schemas import Source
+from src.services.store_versions import StoreVersionRegistry
+from src.utils.gemini_utils import extract_sources_from_grounding
+from src.utils.logger import logger
+from src.utils.text_utils import tokenize
+
+_SLUG_RE = re.compile(r"[^A-Za-z0-9_-]+")
+
+
+def answer_key(query: str) -> str:
+    """
+    Llave canónica de una consulta: tokens normalizados sin stopwords, salvo
+    negaciones y números, que cambian la respuesta.
+    "¿Qué requisitos hay para el retiro?" -> "requisitos retiro"
+    "¿Puedo retirar si no trabajo?" -> "retirar no trabajo"
+    """
+    return " ".join(tokenize(query, keep_guards=True))
+
+
+def _hash_key(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _slug(text: str) -> str:
+    return _SLUG_RE.sub("_", text).strip("_") or "store"
+
+
+@dataclass
+class _LoadedStore:
+    """
+    Respuestas precalculadas de un (store, perfil), mapeadas en memoria:
+      keys.npy     uint64 ordenado (hash de answer_key)
+      offsets.npy  int64 (n + 1) offsets de cada registro en data.bin
+      data.bin     registros JSON UTF-8 concatenados
+    """
+
+    keys: np.ndarray
+    offsets: np.ndarray
+    data: np.ndarray
+    meta: Dict
+    path: Path
+    meta_mtime: float
+
+    def get(self, key: str) -> Optional[Dict]:
+        h = np.uint64(_hash_key(key))
+        idx = int(np.searchsorted(self.keys, h))
+        if idx >= len(self.keys) or self.keys[idx] != h:
+            return None
+
+        start, end = int(self.offsets[idx]), int(self.offsets[idx + 1])
+        record = json.loads(self.data[start:end].tobytes())
+        # Protección ante colisiones de hash
+        if record.get("key") != key:
+            return None
+        return record
+
+
+class AnswerStore:
+    """
+    Almacén de respuestas precalculadas para las consultas más frecuentes.
+
+    Se construye offline con scripts/build_answer_store.py, se carga (mmap) al
+    arrancar y se reconstruye en segundo plano cuando cambian los documentos
+    de un store.
+
+    Cada upload incrementa la generación del store: una reconstrucción que
+    empezó antes de un upload posterior se descarta en lugar de publicarse.
+
+    Con `versions` (StoreVersionRegistry compartido entre workers) cada store
+    guarda en meta.json la versión de documentos con la que se construyó, y
+    solo se sirve mientras coincida con la actual: un upload atendido por otro
+    worker deja de servirse aquí, y la reconstrucción se recarga al detectar
+    que cambió el mtime de meta.json.
+    """
+
+    def __init__(
+        self,
+        base_dir: str | Path | None = None,
+        versions: Optional[StoreVersionRegistry] = None,
+    ) -> None:
+        self.base_dir = Path(base_dir or settings.ANSWER_STORE_DIR)
+        self.versions = versions
+        self._lock = threading.Lock()
+        self._stores: Dict[Tuple[str, str], _LoadedStore] = {}
+        self._generations: Dict[str, int] = {}
+        # (store, perfil) invalidados que aún no terminan de reconstruirse
+        self._rebuilding: Dict[Tuple[str, str], List[str]] = {}
+
+    def generation(self, store_name: str) -> int:
+        with self._lock:
+            return self._generations.get(store_name, 0)
+
+    def _dir_for(self, store_name: str, profile: str) -> Path:
+        return self.base_dir / f"{_slug(store_name)}__{_slug(profile)}"
+
+    # --------- CARGA --------- #
+
+    def load_all(self) -> None:
+        if not self.base_dir.exists():
+            return
+
+        for path in sorted(self.base_dir.iterdir()):
+            # Se omiten restos de escrituras a medias (.tmp-*/.old-*)
+            if ".tmp-" in path.name or ".old-" in path.name:
+                continue
+            if path.is_dir() and (path / "meta.json").exists():
+                try:
+                    self._load_dir(path)
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning("No se pudo cargar answer store {}: {}", path, exc)
+
+    def _load_dir(self, path: Path, generation: Optional[int] = None) -> bool:
+        """
+        Carga y sirve un store. Con `generation`, solo si el store no recibió
+        uploads desde entonces (se verifica bajo el lock, junto con el registro).
+        """
+        meta_path = path / "meta.json"
+        meta_mtime = meta_path.stat().st_mtime
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        loaded = _LoadedStore(
+            keys=np.load(path / "keys.npy", mmap_mode="r"),
+            offsets=np.load(path / "offsets.npy", mmap_mode="r"),
+            data=np.memmap(path / "data.bin", dtype=np.uint8, mode="r")
+            if (path / "data.bin").stat().st_size
+            else np.zeros(0, dtype=np.uint8),
+            meta=meta,
+            path=path,
+            meta_mtime=meta_mtime,
+        )
+        key = (meta["store_name"], meta["profile"])
+        with self._lock:
+            if generation is not None:
+                if generation != self._generations.get(key[0], 0):
+                    return False
+                self._rebuilding.pop(key, None)
+            self._stores[key] = loaded
+        logger.info(
+            "Answer store cargado: {} / {} ({} respuestas)",
+            meta["store_name"],
+            meta["profile"],
+            len(loaded.keys),
+        )
+        return True
+
+    # --------- CONSULTA --------- #
+
+    def get(self, store_name: str, profile: str, query: str) -> Optional[Tuple[str, List[Source]]]:
+        loaded = self._stores.get((store_name, profile))
+        if loaded is None:
+            return None
+        if self.versions is not None:
+            version = self.versions.get(store_name)
+            if loaded.meta.get("store_version") != version:
+                loaded = self._reload_if_rebuilt(loaded, version)
+                if loaded is None:
+                    return None
+
+        record = loaded.get(answer_key(query))
+        if record is None:
+            return None
+
+        sources = [Source(**s) for s in record["sources"]]
+        return record["answer"], sources
+
+    def _reload_if_rebuilt(self, loaded: _LoadedStore, version: str) -> Optional[_LoadedStore]:
+        """
+        El store quedó desactualizado (otro worker atendió un upload). Si la
+        carpeta ya se reescribió (cambió el mtime de meta.json) se recarga;
+        mientras tanto no se sirve.
+        """
+        try:
+            if (loaded.path / "meta.json").stat().st_mtime == loaded.meta_mtime:
+                return None
+            self._load_dir(loaded.path)
+        except Exception as exc:  # noqa: BLE001
+            # Puede estar a media escritura (rename): se reintenta en la siguiente consulta
+            logger.debug("No se pudo recargar answer store {}: {}", loaded.path, exc)
+            return None
+
+        reloaded = self._stores.get((loaded.meta["store_name"], loaded.meta["profile"]))
+        if reloaded is None or reloaded.meta.get("store_version") != version:
+            return None
+        return reloaded
+
+    # --------- CONSTRUCCIÓN --------- #
+
+    def write(
+        self,
+        store_name: str,
+        profile: str,
+        records: List[Dict],
+        queries: List[str],
+        generation: Optional[int] = None,
+        store_version: Optional[str] = None,
+    ) -> Optional[Path]:
+        """
+        Escribe el store de forma atómica (carpeta temporal + rename) y lo carga.
+        records: [{"key", "query", "answer", "sources"}]
+
+        Con `generation`, si el store recibió otro upload desde entonces no se
+        escribe nada y se regresa None (las respuestas ya están desactualizadas).
+        `store_version` es la versión de documentos con la que se respondió
+        (por defecto, la actual).
+        """
+        if store_version is None and self.versions is not None:
+            store_version = self.versions.get(store_name)
+        if generation is not None and generation != self.generation(store_name):
+            logger.info(
+                "Answer store {} / {} descartado: hubo uploads durante la reconstrucción",
+                store_name,
+                profile,
+            )
+            return None
+
+        target = self._dir_for(store_name, profile)
+        tmp = target.with_name(f"{target.name}.tmp-{int(time.time() * 1000)}")
+        tmp.mkdir(parents=True)
+
+        records = sorted(records, key=lambda r: _hash_key(r["key"]))
+        keys = np.array([_hash_key(r["key"]) for r in records], dtype=np.uint64)
+        blobs = [
+            json.dumps(r, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            for r in records
+        ]
+        offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(b) for b in blobs])
+
+        np.save(tmp / "keys.npy", keys)
+        np.save(tmp / "offsets.npy", offsets)
+        (tmp / "data.bin").write_bytes(b"".join(blobs))
+        (tmp / "meta.json").write_text(
+            json.dumps(
+                {
+                    "store_name": store_name,
+                    "profile": profile,
+                    "built_at": time.time(),
+                    "store_version": store_version,
+                    "queries": queries,
+                },
+                ensure_ascii=False,
+            ),
+            encoding="utf-8",
+        )
+
+        old = None
+        if target.exists():
+            old = target.with_name(f"{target.name}.old-{int(time.time() * 1000)}")
+            target.rename(old)
+        tmp.rename(target)
+        if old is not None:
+            shutil.rmtree(old, ignore_errors=True)
+
+        if not self._load_dir(target, generation):
+            logger.info(
+                "Answer store {} / {} descartado: hubo uploads al escribirlo",
+                store_name,
+                profile,
+            )
+            return None
+        return target
+
+    def build(
+        self,
+        store_name: str,
+        profile: str,
+        queries: List[str],
+        gemini_service,
+        prompt_service,
+        concurrency: int = 1,
+        generation: Optional[int] = None,
+    ) -> Optional[Path]:
+        """
+        Responde `queries` con GeminiService.query_with_rag (en paralelo con
+        `concurrency` hilos) y escribe el store. Solo se guardan respuestas
+        con fuentes (grounded).
+
+        Con `generation` la construcción se aborta en cuanto el store recibe
+        otro upload (ver write).
+        """
+        system_instruction, gen_settings = prompt_service.get_profile_settings(profile)
+        # Versión tomada antes de responder: si otro worker atiende un upload
+        # durante la construcción, el resultado ya nace desactualizado
+        store_version = self.versions.get(store_name) if self.versions is not None else None
+
+        unique: Dict[str, str] = {}
+        for query in queries:
+            unique.setdefault(answer_key(query), query)
+        unique.pop("", None)
+
+        def _answer(item: Tuple[str, str]) -> Optional[Dict]:
+            key, query = item
+            if generation is not None and generation != self.generation(store_name):
+                return None
+            try:
+                raw_response = gemini_service.query_with_rag(
+                    store_name=store_name,
+                    query=query,
+                    system_instruction=system_instruction,
+                    generation_config=gen_settings.primary.generation_config,
+                    model=gen_settings.primary.model,
+                )
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Answer store: falló '{}': {}", query, exc)
+                return None
+
+            answer = getattr(raw_response, "text", "") or ""
+            sources = extract_sources_from_grounding(raw_response)
+            if not answer or not sources:
+                return None
+
+            return {
+                "key": key,
+                "query": query,
+                "answer": answer,
+                "sources": [s.model_dump() for s in sources],
+            }
+
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+            records = [r for r in pool.map(_answer, unique.items()) if r is not None]
+
+        logger.info(
+            "Answer store {} / {}: {} de {} consultas respondidas",
+            store_name,
+            profile,
+            len(records),
+            len(queries),
+        )
+        return self.write(
+            store_name,
+            profile,
+            records,
+            queries,
+            generation=generation,
+            store_version=store_version,
+        )
+
+    # --------- INVALIDACIÓN --------- #
+
+    def invalidate_store(self, store_name: str) -> List[Tuple[str, Dict]]:
+        """
+        Deja de servir las respuestas de un store. Regresa (profile, meta) de lo
+        invalidado para poder reconstruirlo.
+        """
+        with self._lock:
+            keys = [k for k in self._stores if k[0] == store_name]
+            return [(k[1], self._stores.pop(k).meta) for k in keys]
+
+    def make_upload_listener(self, gemini_service, prompt_service):
+        """
+        Listener de FileService: invalida los stores afectados y los
+        reconstruye en segundo plano con las mismas consultas.
+        """
+
+        def _on_files_uploaded(
+            store_name: str,
+            files: List[Tuple[str, str]],
+            affected: List[str],
+        ) -> None:
+            # Primero la generación: ninguna reconstrucción anterior podrá publicarse
+            with self._lock:
+                for name in affected:
+                    self._generations[name] = self._generations.get(name, 0) + 1
+
+            invalidated = [
+                (name, profile, meta["queries"])
+                for name in affected
+                for profile, meta in self.invalidate_store(name)
+            ]
+            with self._lock:
+                for name, profile, queries in invalidated:
+                    self._rebuilding[(name, profile)] = queries
+                # Incluye reconstrucciones en curso: ya quedaron desactualizadas
+                to_rebuild = [
+                    (name, profile, queries, self._generations[name])
+                    for (name, profile), queries in self._rebuilding.items()
+                    if name in affected
+                ]
+            if not to_rebuild or not settings.ANSWER_STORE_AUTO_REBUILD:
+                return
+
+            def _rebuild() -> None:
+                for name, profile, queries, generation in to_rebuild:
+                    try:
+                        self.build(
+                            name,
+                            profile,
+                            queries,
+                            gemini_service,
+                            prompt_service,
+                            generation=generation,
+                        )
+                    except Exception:  # noqa: BLE001
+                        logger.exception("Error al reconstruir answer store {} / {}", name, profile)
+
+            threading.Thread(target=_rebuild, name="answer-store-rebuild", daemon=True).start()
+            logger.info("Reconstrucción de answer store programada para {}", affected)
+
+        return _on_files_uploaded
@@ -1,18 +1,41 @@
 import tempfile
 from pathlib import Path
-from typing import List
+from typing import Callable, List, Optional, Tuple
 
 from fastapi import UploadFile
 
 from src.models.schemas import UploadResponse, DiscardedFile
 from src.preprocessing.cleaner import validate_file
+from src.config import settings
 from src.services.gemini_service import GeminiService
 from src.utils.logger import logger
 
 
+# Listener notificado tras subir archivos:
+# (store_name, [(filename, ruta_local)], stores_afectados)
+UploadListener = Callable[[str, List[Tuple[str, str]], List[str]], None]
+
+
+def affected_stores(store_name: str) -> List[str]:
+    """
+    Stores cuyas respuestas cambian cuando se suben documentos a store_name:
+    el propio store y el General, cuyas consultas pueden rutearse a este store.
+    """
+    affected = [store_name]
+    for general in ("general", settings.GEMINI_STORE_GENERAL):
+        if general and general not in affected:
+            affected.append(general)
+    return affected
+
+
 class FileService:
-    def __init__(self, gemini_service: GeminiService) -> None:
+    def __init__(
+        self,
+        gemini_service: GeminiService,
+        upload_listeners: Optional[List[UploadListener]] = None,
+    ) -> None:
         self.gemini_service = gemini_service
+        self.upload_listeners: List[UploadListener] = list(upload_listeners or [])
 
     def process_and_upload(
         self,
@@ -29,7 +52,7 @@ class FileService:
 
             if not accepted:
                 logger.info(
-                    f"Archivo descartado: {file.filename} | {reason} | {size_mb} MB"
+                    "Archivo descartado: {} | {} | {} MB", file.filename, reason, size_mb
                 )
                 discarded_files.append(
                     DiscardedFile(
@@ -56,13 +79,16 @@ class FileService:
         # 3) Subir a Gemini (solo si hay aceptados)
         if temp_paths:
             logger.info(
-                f"Subiendo {len(temp_paths)} archivos a store {store_name}..."
+                "Subiendo {} archivos a store {}...", len(temp_paths), store_name
             )
             self.gemini_service.upload_files_to_store(
                 store_name=store_name,
                 file_paths=temp_paths,
                 wait_for_index=True,
             )
+            self._notify_listeners(
+                store_name, list(zip(accepted_files, temp_paths))
+            )
 
         # Nota: al ser un MVP no limpiamos los temporales aún.
         return UploadResponse(
@@ -70,3 +96,19 @@ class FileService:
             accepted_files=accepted_files,
             discarded_files=discarded_files,
         )
+
+    def _notify_listeners(
+        self,
+        store_name: str,
+        files: List[Tuple[str, str]],
+    ) -> None:
+        """
+        Avisa a los listeners (router, caches, etc.) que el store cambió.
+        Un listener que falla no debe romper la respuesta del upload.
+        """
+        affected = affected_stores(store_name)
+        for listener in self.upload_listeners:
+            try:
+                listener(store_name, files, affected)
+            except Exception:  # noqa: BLE001
+                logger.exception("Error en listener de upload para store {}", store_name)
@@ -1,3 +1,4 @@
+import asyncio
 import time
 from typing import List, Dict, Any
 
@@ -6,7 +7,15 @@ from google.genai import types  # type: ignore
 
 from src.config import settings
 from src.utils.logger import logger
-from src.utils.exceptions import GeminiServiceError
+from src.utils.exceptions import GeminiServiceError, GeminiTimeoutError
+from src.utils.latency import LatencyTracker
+from src.utils.rate_limiter import AsyncRateLimiter, HedgeBudget
+
+# Parámetros de generación por defecto; los perfiles pueden sobreescribirlos
+DEFAULT_GENERATION_CONFIG: Dict[str, Any] = {
+    "temperature": 0.2,
+    "max_output_tokens": 3000,
+}
 
 
 class GeminiService:
@@ -17,6 +26,27 @@ class GeminiService:
         self.client = genai.Client(api_key=settings.GEMINI_API_KEY)
         self.model_name = settings.GEMINI_MODEL
 
+        # Latencias observadas de generate_content por modelo (para decidir hedging)
+        self._latency: Dict[str, LatencyTracker] = {}
+        self.rate_limiter = AsyncRateLimiter(
+            settings.GEMINI_RATE_LIMIT_RPM,
+            burst=settings.GEMINI_RATE_LIMIT_BURST,
+        )
+        self.hedge_budget = HedgeBudget(settings.QUERY_HEDGE_MAX_RATIO)
+
+    def latency(self, model: str | None = None) -> LatencyTracker:
+        """
+        Ventana de latencias de un modelo (None = GEMINI_MODEL). Se separa por
+        modelo para que los tiers rápidos no bajen el percentil de los lentos.
+        """
+        model = model or self.model_name
+        tracker = self._latency.get(model)
+        if tracker is None:
+            tracker = self._latency.setdefault(
+                model, LatencyTracker(min_samples=settings.QUERY_HEDGE_MIN_SAMPLES)
+            )
+        return tracker
+
     # --------- STORES --------- #
 
     def create_store(self, display_name: str) -> str:
@@ -27,7 +57,7 @@ class GeminiService:
             store = self.client.file_search_stores.create(
                 config={"display_name": display_name}
             )
-            logger.info(f"FileSearchStore creado: {store.name}")
+            logger.info("FileSearchStore creado: {}", store.name)
             return store.name
         except Exception as exc:  # noqa: BLE001
             logger.exception("Error al crear FileSearchStore")
@@ -56,10 +86,10 @@ class GeminiService:
                     file=path,
                     file_search_store_name=store_name,
                 )
-                logger.info(f"Upload iniciado para {path}: op={op_name}")
+                logger.info("Upload iniciado para {}: op={}", path, op_name)
                 operations.append(op_name)
             except Exception as exc:  # noqa: BLE001
-                logger.exception(f"Error al subir archivo a FileSearchStore: {path}")
+                logger.exception("Error al subir archivo a FileSearchStore: {}", path)
                 # No levantamos excepción global para no frenar todo el batch
                 continue
 
@@ -78,53 +108,195 @@ class GeminiService:
         """
         for op_name in operation_names:
             try:
-                logger.info(f"Esperando operación de indexado: {op_name}")
+                logger.info("Esperando operación de indexado: {}", op_name)
                 operation = self.client.operations.get(op_name)
                 while not operation.done:
                     time.sleep(poll_interval_sec)
                     operation = self.client.operations.get(op_name)
 
-                logger.info(f"Operación completada: {op_name}")
+                logger.info("Operación completada: {}", op_name)
             except Exception as exc:  # noqa: BLE001
-                logger.exception(f"Error al esperar operación: {op_name}: {exc}")
+                logger.exception("Error al esperar operación: {}: {}", op_name, exc)
 
     # --------- QUERY RAG --------- #
 
     def query_with_rag(
         self,
-        store_name: str,
+        store_name: str | List[str],
         query: str,
         system_instruction: str,
         generation_config: Dict[str, Any] | None = None,
+        model: str | None = None,
+        history: List[Dict[str, str]] | None = None,
     ) -> Any:  # retornamos el response raw; otra capa lo parsea
         """
         Ejecuta una consulta con File Search habilitado como Tool.
-        """
-        if generation_config is None:
-            generation_config = {
-                "temperature": 0.2,
-                "max_output_tokens": 3000,
-            }
+        store_name puede ser un store o una lista de stores (p.ej. leyes + tramites).
+        model=None usa GEMINI_MODEL. history son turnos previos [{"role", "text"}].
 
+        Es la variante para trabajo en segundo plano (p.ej. el answer store):
+        pasa por el rate limiter dejando la mitad de la ráfaga al tráfico en vivo.
+        """
+        self.rate_limiter.acquire_blocking(reserve=self.rate_limiter.capacity / 2)
         try:
-            tool = types.Tool(
-                file_search=types.FileSearch(
-                    file_search_store_names=[store_name],
-                )
+            config = self._build_config(
+                store_name, system_instruction, generation_config
             )
-
-            config = types.GenerateContentConfig(
-                system_instruction=system_instruction,
-                tools=[tool],
-                **generation_config,
-            )
-
+            contents = self._build_contents(query, history)
             response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=query,
+                model=model or self.model_name,
+                contents=contents,
                 config=config,
             )
             return response
         except Exception as exc:  # noqa: BLE001
             logger.exception("Error al ejecutar query_with_rag")
             raise GeminiServiceError(str(exc)) from exc
+
+    async def aquery_with_rag(
+        self,
+        store_name: str | List[str],
+        query: str,
+        system_instruction: str,
+        generation_config: Dict[str, Any] | None = None,
+        deadline_seconds: float | None = None,
+        model: str | None = None,
+        history: List[Dict[str, str]] | None = None,
+    ) -> Any:
+        """
+        Versión async de query_with_rag con deadline, cancelación y hedging.
+
+        - Si se excede el deadline se cancela la llamada y se levanta GeminiTimeoutError.
+        - Si la tarea se cancela (p.ej. el cliente se desconectó) se cancelan las
+          llamadas en curso.
+        - Con QUERY_HEDGE_ENABLED, si la primera llamada supera el p95 observado se
+          lanza una segunda idéntica y se usa la que termine primero. Solo si queda
+          presupuesto de hedging (QUERY_HEDGE_MAX_RATIO) y el rate limiter tiene cuota.
+        - Las llamadas canceladas (hedge perdedor, deadline) también registran su
+          latencia, como cota inferior, para que el percentil no se subestime.
+        """
+        deadline_seconds = deadline_seconds or settings.QUERY_DEADLINE_SECONDS
+        deadline = time.monotonic() + deadline_seconds
+
+        try:
+            config = self._build_config(
+                store_name, system_instruction, generation_config
+            )
+            contents = self._build_contents(query, history)
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Error al construir la configuración de query_with_rag")
+            raise GeminiServiceError(str(exc)) from exc
+
+        latency = self.latency(model)
+
+        async def _call() -> Any:
+            start = time.monotonic()
+            try:
+                response = await self.client.aio.models.generate_content(
+                    model=model or self.model_name,
+                    contents=contents,
+                    config=config,
+                )
+            except asyncio.CancelledError:
+                latency.record(time.monotonic() - start)
+                raise
+            latency.record(time.monotonic() - start)
+            return response
+
+        if not await self.rate_limiter.acquire(timeout=deadline_seconds):
+            raise GeminiTimeoutError(
+                "Sin cuota de Gemini disponible dentro del deadline."
+            )
+
+        self.hedge_budget.on_call()
+        pending = {asyncio.create_task(_call())}
+        try:
+            hedge_after = None
+            if settings.QUERY_HEDGE_ENABLED:
+                hedge_after = latency.percentile(settings.QUERY_HEDGE_PERCENTILE)
+
+            if hedge_after is not None and hedge_after < deadline - time.monotonic():
+                done, _ = await asyncio.wait(pending, timeout=hedge_after)
+                if (
+                    not done
+                    and self.hedge_budget.try_spend()
+                    and self.rate_limiter.try_acquire()
+                ):
+                    logger.info(
+                        "Hedging: primera llamada excedió p{:g} ({:.2f}s); "
+                        "lanzando segunda llamada",
+                        settings.QUERY_HEDGE_PERCENTILE,
+                        hedge_after,
+                    )
+                    pending.add(asyncio.create_task(_call()))
+
+            last_exc: BaseException | None = None
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=remaining,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_exc = task.exception()
+
+            if last_exc is not None and not pending:
+                logger.opt(exception=last_exc).error("Error al ejecutar query_with_rag")
+                raise GeminiServiceError(str(last_exc)) from last_exc
+
+            raise GeminiTimeoutError(
+                f"Gemini no respondió dentro del deadline de {deadline_seconds:g}s."
+            )
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
+    def _build_contents(
+        query: str,
+        history: List[Dict[str, str]] | None = None,
+    ) -> str | List[types.Content]:
+        """
+        Sin historial se envía la consulta tal cual; con historial se arma
+        la conversación multi-turno terminando en la consulta actual.
+        """
+        if not history:
+            return query
+
+        contents = [
+            types.Content(role=turn["role"], parts=[types.Part(text=turn["text"])])
+            for turn in history
+        ]
+        contents.append(types.Content(role="user", parts=[types.Part(text=query)]))
+        return contents
+
+    def _build_config(
+        self,
+        store_name: str | List[str],
+        system_instruction: str,
+        generation_config: Dict[str, Any] | None = None,
+    ) -> types.GenerateContentConfig:
+        """
+        Construye la configuración de generate_content con File Search como Tool.
+        generation_config se combina sobre DEFAULT_GENERATION_CONFIG.
+        store_name puede ser un store o una lista de stores (p.ej. leyes + tramites).
+        """
+        generation_config = {**DEFAULT_GENERATION_CONFIG, **(generation_config or {})}
+
+        store_names = [store_name] if isinstance(store_name, str) else list(store_name)
+        tool = types.Tool(
+            file_search=types.FileSearch(
+                file_search_store_names=store_names,
+            )
+        )
+
+        return types.GenerateContentConfig(
+            system_instruction=system_instruction,
+            tools=[tool],
+            **generation_config,
+        )
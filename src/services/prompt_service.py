@@ -1,15 +1,81 @@
-from typing import Tuple
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
 
+from src.config import settings
 from src.prompting.prompt_manager import load_prompt
 from src.utils.logger import logger
 
 
+@dataclass
+class ModelTier:
+    """
+    Modelo + parámetros de generación con los que se ejecuta una consulta.
+    model=None significa usar GEMINI_MODEL.
+    """
+
+    model: Optional[str] = None
+    generation_config: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class GenerationSettings:
+    """
+    Configuración de generación de un perfil: tier principal y, opcionalmente,
+    un tier barato para consultas simples (cascade).
+    """
+
+    primary: ModelTier
+    cascade: Optional[ModelTier] = None
+    cascade_max_query_words: int = 0
+
+    def use_cascade(self, query: str) -> bool:
+        """
+        Consultas cortas y de una sola pregunta van primero al tier barato.
+        """
+        if self.cascade is None:
+            return False
+        return (
+            len(query.split()) <= self.cascade_max_query_words
+            and query.count("?") <= 1
+        )
+
+
+@dataclass
+class _CachedProfile:
+    signature: Optional[Tuple[Tuple[str, int], ...]]
+    system_instruction: str
+    generation: GenerationSettings
+    fingerprint: str
+
+
+def _file_signature(paths: List[str]) -> Optional[Tuple[Tuple[str, int], ...]]:
+    """
+    (ruta, mtime_ns) de cada archivo; None si alguno ya no existe.
+    """
+    try:
+        return tuple((path, os.stat(path).st_mtime_ns) for path in paths)
+    except OSError:
+        return None
+
+
 class PromptService:
     """
     Capa fina sobre prompt_manager para centralizar lógica
     de cómo construimos las instrucciones de sistema.
+
+    Los perfiles se cachean en memoria y se recargan cuando cambia el mtime
+    de prompt_config.yaml o de sus archivos de prompt (o GEMINI_MODEL), así
+    que cada consulta solo hace unos stat() en lugar de parsear el YAML.
     """
 
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, _CachedProfile] = {}
+
     def get_system_instruction(
         self,
         profile: str,
@@ -18,13 +84,91 @@ class PromptService:
         Regresa (profile_usado, system_instruction).
         Si no existe el perfil solicitado, cae a 'default'.
         """
+        return profile, self._get_profile(profile).system_instruction
+
+    def get_profile_settings(
+        self,
+        profile: str,
+    ) -> Tuple[str, GenerationSettings]:
+        """
+        Regresa (system_instruction, GenerationSettings) del perfil.
+        """
+        cached = self._get_profile(profile)
+        return cached.system_instruction, cached.generation
+
+    def profile_fingerprint(self, profile: str) -> str:
+        """
+        Hash de todo lo que define la respuesta de un perfil: system instruction,
+        modelos (GEMINI_MODEL si el perfil no fija uno) y parámetros de generación.
+        Cambia al editar prompt_config.yaml, los prompts o GEMINI_MODEL.
+        """
+        return self._get_profile(profile).fingerprint
+
+    def _get_profile(self, profile: str) -> _CachedProfile:
+        cached = self._profiles.get(profile)
+        if (
+            cached is not None
+            and cached.signature is not None
+            and cached.signature == _file_signature([path for path, _ in cached.signature])
+            and cached.fingerprint.startswith(settings.GEMINI_MODEL + ":")
+        ):
+            return cached
+
+        with self._lock:
+            cached = self._load_profile(profile)
+            self._profiles[profile] = cached
+        return cached
+
+    def _load_profile(self, profile: str) -> _CachedProfile:
         data = load_prompt(profile)
+        system_instruction = self._system_instruction_from(profile, data)
+
+        primary = ModelTier(
+            model=data.get("model"),
+            generation_config=dict(data.get("generation_config") or {}),
+        )
+
+        cascade_cfg = data.get("cascade") or {}
+        cascade = None
+        if cascade_cfg.get("enabled", True) and cascade_cfg.get("model"):
+            cascade = ModelTier(
+                model=cascade_cfg["model"],
+                # El tier barato hereda la config del perfil salvo lo que sobreescriba
+                generation_config={
+                    **primary.generation_config,
+                    **(cascade_cfg.get("generation_config") or {}),
+                },
+            )
+
+        generation = GenerationSettings(
+            primary=primary,
+            cascade=cascade,
+            cascade_max_query_words=int(cascade_cfg.get("max_query_words", 12)),
+        )
+
+        raw = json.dumps(
+            [system_instruction, settings.GEMINI_MODEL, asdict(generation)],
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest()
+
+        return _CachedProfile(
+            signature=_file_signature(data.get("source_files") or []),
+            system_instruction=system_instruction,
+            generation=generation,
+            fingerprint=f"{settings.GEMINI_MODEL}:{digest}",
+        )
+
+    @staticmethod
+    def _system_instruction_from(profile: str, data: Dict[str, Any]) -> str:
         system_instruction = data.get("system_instruction", "").strip()
 
         if not system_instruction:
             logger.warning(
-                f"Prompt profile '{profile}' sin system_instruction. "
-                "Usando texto mínimo de fallback."
+                "Prompt profile '{}' sin system_instruction. "
+                "Usando texto mínimo de fallback.",
+                profile,
             )
             system_instruction = (
                 "Eres un asistente experto en el Sistema de Ahorro para el Retiro. "
@@ -32,4 +176,4 @@ class PromptService:
                 "'Fuentes' con las citas de los documentos utilizados."
             )
 
-        return profile, system_instruction
+        return system_instruction
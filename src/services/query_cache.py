@@ -0,0 +1,213 @@
+import hashlib
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from src.config import settings
+from src.models.schemas import Source
+from src.utils.logger import logger, sampled_logger
+from src.utils.text_utils import guard_tokens, tokenize
+
+
+@dataclass
+class CachedAnswer:
+    query: str
+    answer: str
+    sources: List[Source]
+    similarity: float = 1.0
+    guards: FrozenSet[str] = frozenset()
+
+
+def embed_query(text: str, dim: int, ngram: int = 3) -> np.ndarray:
+    """
+    Embedding local de una consulta con n-gramas de caracteres hasheados.
+
+    Se normaliza (sin acentos ni puntuación), se quitan stopwords salvo
+    negaciones y números (que además deben coincidir exactamente, ver
+    guard_tokens) y se ordenan los tokens, así que el orden no afecta.
+    Usamos crc32 en lugar de hash() porque este último cambia entre procesos.
+    """
+    vec = np.zeros(dim, dtype=np.float32)
+    for token in sorted(tokenize(text, keep_guards=True)):
+        padded = f" {token} "
+        for i in range(max(len(padded) - ngram + 1, 1)):
+            gram = padded[i : i + ngram].encode("utf-8")
+            vec[zlib.crc32(gram) % dim] += 1.0
+
+    norm = np.linalg.norm(vec)
+    if norm > 0:
+        vec /= norm
+    return vec
+
+
+def _guards_hash(guards: FrozenSet[str]) -> int:
+    raw = "\x1f".join(sorted(guards)).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "little")
+
+
+class _Bucket:
+    """
+    Caché de un par (store, perfil): una matriz fija (capacity x dim) con los
+    embeddings y arreglos paralelos con las respuestas, su último uso y el
+    hash de sus negaciones/números (que deben coincidir exactamente).
+    """
+
+    def __init__(self, capacity: int, dim: int) -> None:
+        self.matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self.entries: List[Optional[CachedAnswer]] = [None] * capacity
+        self.last_used = np.zeros(capacity, dtype=np.float64)
+        self.created = np.zeros(capacity, dtype=np.float64)
+        self.guards = np.zeros(capacity, dtype=np.uint64)
+        self.size = 0
+
+    def lookup(
+        self,
+        vec: np.ndarray,
+        guards: FrozenSet[str],
+        threshold: float,
+        ttl: float,
+    ) -> Optional[CachedAnswer]:
+        if self.size == 0:
+            return None
+
+        sims = self.matrix[: self.size] @ vec
+        # Solo son candidatas las consultas con las mismas negaciones y números
+        sims[self.guards[: self.size] != np.uint64(_guards_hash(guards))] = -1.0
+        idx = int(np.argmax(sims))
+        similarity = float(sims[idx])
+        if similarity < threshold or self.entries[idx].guards != guards:
+            return None
+
+        now = time.time()
+        if ttl and now - self.created[idx] > ttl:
+            return None
+
+        self.last_used[idx] = now
+        entry = self.entries[idx]
+        return CachedAnswer(
+            query=entry.query,
+            answer=entry.answer,
+            sources=entry.sources,
+            similarity=similarity,
+            guards=entry.guards,
+        )
+
+    def insert(self, vec: np.ndarray, entry: CachedAnswer) -> None:
+        if self.size < len(self.entries):
+            idx = self.size
+            self.size += 1
+        else:
+            # Lleno: reemplazamos la entrada menos usada recientemente
+            idx = int(np.argmin(self.last_used))
+
+        now = time.time()
+        self.matrix[idx] = vec
+        self.entries[idx] = entry
+        self.guards[idx] = _guards_hash(entry.guards)
+        self.last_used[idx] = now
+        self.created[idx] = now
+
+
+class SimilarityQueryCache:
+    """
+    Caché de respuestas para consultas casi duplicadas.
+
+    La búsqueda es un producto matriz-vector contra las consultas cacheadas
+    del mismo store y perfil. La memoria está acotada por
+    QUERY_CACHE_MAX_BUCKETS x QUERY_CACHE_MAX_ENTRIES x QUERY_CACHE_DIM floats.
+    """
+
+    def __init__(
+        self,
+        threshold: float | None = None,
+        dim: int | None = None,
+        max_entries: int | None = None,
+        max_buckets: int | None = None,
+        ttl_seconds: float | None = None,
+    ) -> None:
+        self.threshold = threshold if threshold is not None else settings.QUERY_CACHE_THRESHOLD
+        self.dim = dim or settings.QUERY_CACHE_DIM
+        self.max_entries = max_entries or settings.QUERY_CACHE_MAX_ENTRIES
+        self.max_buckets = max_buckets or settings.QUERY_CACHE_MAX_BUCKETS
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.QUERY_CACHE_TTL_SECONDS
+
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[Tuple[str, str], _Bucket]" = OrderedDict()
+
+    def get(self, store_name: str, profile: str, query: str) -> Optional[CachedAnswer]:
+        vec = embed_query(query, self.dim)
+        if not vec.any():
+            return None
+
+        with self._lock:
+            bucket = self._buckets.get((store_name, profile))
+            if bucket is None:
+                return None
+            self._buckets.move_to_end((store_name, profile))
+            hit = bucket.lookup(vec, guard_tokens(query), self.threshold, self.ttl_seconds)
+
+        if hit is not None:
+            sampled_logger.info(
+                "♻️ Cache hit ({:.3f}) para store={} perfil={}",
+                hit.similarity,
+                store_name,
+                profile,
+            )
+        return hit
+
+    def put(
+        self,
+        store_name: str,
+        profile: str,
+        query: str,
+        answer: str,
+        sources: List[Source],
+    ) -> None:
+        vec = embed_query(query, self.dim)
+        if not vec.any() or not answer:
+            return
+
+        key = (store_name, profile)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_buckets:
+                    self._buckets.popitem(last=False)
+                bucket = _Bucket(self.max_entries, self.dim)
+                self._buckets[key] = bucket
+            self._buckets.move_to_end(key)
+            bucket.insert(
+                vec,
+                CachedAnswer(
+                    query=query,
+                    answer=answer,
+                    sources=sources,
+                    guards=guard_tokens(query),
+                ),
+            )
+
+    def invalidate_store(self, store_name: str) -> None:
+        """
+        Descarta todas las respuestas cacheadas de un store (p.ej. tras subir documentos).
+        """
+        with self._lock:
+            for key in [k for k in self._buckets if k[0] == store_name]:
+                del self._buckets[key]
+
+    def on_files_uploaded(
+        self,
+        store_name: str,
+        files: List[Tuple[str, str]],
+        affected: List[str],
+    ) -> None:
+        """
+        Listener de FileService: invalida los stores afectados por el upload.
+        """
+        for name in affected:
+            self.invalidate_store(name)
+        logger.info("Caché de consultas invalidada para stores {}", affected)
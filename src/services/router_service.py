@@ -0,0 +1,292 @@
+import json
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+import yaml
+
+from src.config import settings
+from src.utils.logger import logger, sampled_logger
+from src.utils.text_utils import light_stem, tokenize
+
+# Máximo de caracteres que leemos por documento ingerido
+MAX_DOC_CHARS = 20_000
+
+# Términos más frecuentes que conservamos por documento (controla memoria y disco)
+MAX_DOC_TERMS = 300
+
+# Extensiones de las que podemos leer texto sin dependencias extra
+TEXT_EXTENSIONS = {".txt", ".md"}
+
+
+@dataclass
+class RoutingDecision:
+    labels: List[str]
+    store_names: List[str]
+    scores: Dict[str, float] = field(default_factory=dict)
+    elapsed_ms: float = 0.0
+
+
+def _terms(text: str) -> List[str]:
+    return [light_stem(t) for t in tokenize(text)]
+
+
+class QueryRouterService:
+    """
+    Router local TF-IDF que decide si una consulta al store General puede
+    resolverse en un store más angosto (leyes, tramites o ambos).
+
+    El índice se construye con las semillas de router_config.yaml más los
+    términos de los documentos que se suben a cada store (como conteos, hasta
+    QUERY_ROUTER_MAX_DOCS_PER_LABEL por label). La matriz de centroides se
+    recalcula al ingerir documentos, fuera del camino de las consultas, y se
+    reemplaza de forma atómica.
+    """
+
+    def __init__(
+        self,
+        config_path: str | Path | None = None,
+        index_path: str | Path | None = None,
+        max_docs_per_label: int | None = None,
+    ) -> None:
+        self.config_path = Path(config_path or settings.QUERY_ROUTER_CONFIG_PATH)
+        self.index_path = Path(index_path or settings.QUERY_ROUTER_INDEX_PATH)
+        self.max_docs_per_label = max_docs_per_label or settings.QUERY_ROUTER_MAX_DOCS_PER_LABEL
+
+        self._lock = threading.Lock()
+        # Semillas (fijas) y documentos ingeridos (los más recientes) por label
+        self._seeds: Dict[str, List[Counter]] = {}
+        self._docs: Dict[str, Deque[Counter]] = {}
+
+        # (labels, vocab, idf, centroids) -> se reemplaza de forma atómica
+        self._index: Tuple[List[str], Dict[str, int], np.ndarray, np.ndarray] | None = None
+
+        self._load_corpus()
+        self._build_index()
+
+    # --------- CORPUS --------- #
+
+    @staticmethod
+    def _doc_terms(text: str) -> Counter:
+        return Counter(dict(Counter(_terms(text)).most_common(MAX_DOC_TERMS)))
+
+    def _label_docs(self, label: str) -> Deque[Counter]:
+        return self._docs.setdefault(label, deque(maxlen=self.max_docs_per_label))
+
+    def _load_corpus(self) -> None:
+        """
+        Carga semillas de keywords y documentos previamente ingeridos.
+        """
+        if self.config_path.exists():
+            with self.config_path.open("r", encoding="utf-8") as f:
+                config = yaml.safe_load(f) or {}
+            for label, label_cfg in (config.get("labels") or {}).items():
+                keywords = (label_cfg or {}).get("keywords") or []
+                # Cada keyword cuenta como un mini-documento semilla
+                self._seeds.setdefault(label, []).extend(
+                    Counter(_terms(keyword)) for keyword in keywords
+                )
+        else:
+            logger.warning("Router sin archivo de configuración: {}", self.config_path)
+
+        if self.index_path.exists():
+            try:
+                stored = json.loads(self.index_path.read_text(encoding="utf-8"))
+                for label, docs in stored.items():
+                    self._label_docs(label).extend(Counter(doc) for doc in docs)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("No se pudo leer el índice del router: {}", exc)
+
+    def _persist_documents(self) -> None:
+        """
+        Escribe los conteos de términos de los documentos (acotados por label)
+        de forma atómica. Se llama con el lock tomado.
+        """
+        stored = {label: [dict(counts) for counts in docs] for label, docs in self._docs.items()}
+
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(stored, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.index_path)
+
+    def label_for_store(self, store_name: str) -> Optional[str]:
+        """
+        Mapea un store_name al label del router usando GEMINI_STORE_<LABEL>.
+        """
+        for label in {**self._seeds, **self._docs}:
+            if store_name in (label, self.store_for_label(label)):
+                return label
+        return None
+
+    @staticmethod
+    def store_for_label(label: str) -> Optional[str]:
+        return getattr(settings, f"GEMINI_STORE_{label.upper()}", None)
+
+    def add_documents(self, label: str, texts: List[str], persist: bool = True) -> None:
+        """
+        Agrega documentos al corpus de un label y reconstruye el índice. Se llama
+        desde el listener de uploads (threadpool), no desde las consultas.
+        """
+        docs = [self._doc_terms(t[:MAX_DOC_CHARS]) for t in texts if t.strip()]
+        docs = [d for d in docs if d]
+        if not docs:
+            return
+
+        with self._lock:
+            self._label_docs(label).extend(docs)
+            if persist:
+                try:
+                    self._persist_documents()
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning("No se pudo persistir el índice del router: {}", exc)
+            self._build_index()
+
+    def on_files_uploaded(
+        self,
+        store_name: str,
+        files: List[Tuple[str, str]],
+        affected: List[str],
+    ) -> None:
+        """
+        Listener de FileService: recibe (filename, ruta_local) de los archivos
+        subidos y los agrega al corpus del label correspondiente.
+        """
+        label = self.label_for_store(store_name)
+        if label is None:
+            return
+
+        texts: List[str] = []
+        for filename, path in files:
+            # El nombre del archivo suele ser muy descriptivo ("Ley_del_Seguro_Social.pdf")
+            text = filename
+            if Path(filename).suffix.lower() in TEXT_EXTENSIONS:
+                try:
+                    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                        text += "\n" + f.read(MAX_DOC_CHARS)
+                except OSError as exc:
+                    logger.warning("Router no pudo leer {}: {}", filename, exc)
+            texts.append(text)
+
+        self.add_documents(label, texts)
+
+        logger.info("Router actualizado con {} documentos para '{}'", len(files), label)
+
+    # --------- ÍNDICE --------- #
+
+    def _build_index(self) -> None:
+        """
+        Calcula vocabulario, idf y una matriz de centroides TF-IDF (labels x vocab)
+        con filas normalizadas L2. El índice nuevo se publica con una sola
+        asignación, así que las consultas en curso siguen usando el anterior.
+        """
+        labels = [
+            label
+            for label in {**self._seeds, **self._docs}
+            if self._seeds.get(label) or self._docs.get(label)
+        ]
+        tokenized: List[Tuple[int, Counter]] = []
+        vocab: Dict[str, int] = {}
+
+        for label_idx, label in enumerate(labels):
+            for counts in [*self._seeds.get(label, []), *self._docs.get(label, [])]:
+                for term in counts:
+                    vocab.setdefault(term, len(vocab))
+                tokenized.append((label_idx, counts))
+
+        n_docs = max(len(tokenized), 1)
+        df = np.zeros(len(vocab), dtype=np.float32)
+        for _, counts in tokenized:
+            df[[vocab[t] for t in counts]] += 1
+        idf = np.log((1 + n_docs) / (1 + df)) + 1.0
+
+        centroids = np.zeros((len(labels), len(vocab)), dtype=np.float32)
+        for label_idx, counts in tokenized:
+            if not counts:
+                continue
+            ids = np.fromiter((vocab[t] for t in counts), dtype=np.int64, count=len(counts))
+            tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            weights = (1.0 + np.log(tf)) * idf[ids]
+            centroids[label_idx, ids] += weights / np.linalg.norm(weights)
+
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        centroids /= np.where(norms == 0, 1.0, norms)
+
+        self._index = (labels, vocab, idf, centroids)
+        logger.info(
+            "Índice del router construido: {} labels, {} términos", len(labels), len(vocab)
+        )
+
+    # --------- RUTEO --------- #
+
+    def score(self, query: str) -> Dict[str, float]:
+        """
+        Similitud coseno entre la consulta y el centroide de cada label.
+        """
+        labels, vocab, idf, centroids = self._index
+        counts = Counter(t for t in _terms(query) if t in vocab)
+        if not counts or not labels:
+            return {label: 0.0 for label in labels}
+
+        ids = np.fromiter((vocab[t] for t in counts), dtype=np.int64, count=len(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        weights = (1.0 + np.log(tf)) * idf[ids]
+        scores = centroids[:, ids] @ weights / np.linalg.norm(weights)
+
+        return {label: float(s) for label, s in zip(labels, scores)}
+
+    def route(self, query: str) -> Optional[RoutingDecision]:
+        """
+        Regresa los labels/stores elegidos, o None si ningún label supera
+        el umbral de confianza (se mantiene el store original).
+        """
+        start = time.perf_counter()
+        scores = self.score(query)
+
+        top = max(scores.values(), default=0.0)
+        labels = [
+            label
+            for label, s in sorted(scores.items(), key=lambda kv: -kv[1])
+            if s >= settings.QUERY_ROUTER_MIN_SCORE
+            and s >= top * settings.QUERY_ROUTER_BOTH_RATIO
+            and self.store_for_label(label)
+        ]
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if not labels:
+            sampled_logger.info(
+                "🧭 Router sin confianza suficiente | scores={} | {:.3f} ms",
+                scores,
+                elapsed_ms,
+            )
+            return None
+
+        decision = RoutingDecision(
+            labels=labels,
+            store_names=[self.store_for_label(label) for label in labels],
+            scores=scores,
+            elapsed_ms=elapsed_ms,
+        )
+        sampled_logger.info(
+            "🧭 Router -> {} | scores={} | {:.3f} ms", labels, scores, elapsed_ms
+        )
+        return decision
+
+    def resolve_stores(self, store_name: str, query: str) -> List[str]:
+        """
+        Devuelve los stores sobre los que debe buscarse la consulta.
+        Solo se rutea cuando el destino es el store General y el router está habilitado.
+        """
+        if not settings.QUERY_ROUTER_ENABLED:
+            return [store_name]
+
+        if store_name not in ("general", settings.GEMINI_STORE_GENERAL):
+            return [store_name]
+
+        decision = self.route(query)
+        if decision is None:
+            return [settings.GEMINI_STORE_GENERAL or store_name]
+        return decision.store_names
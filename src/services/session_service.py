@@ -0,0 +1,140 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from src.config import settings
+from src.utils.logger import sampled_logger
+
+# Aproximación estándar: ~4 caracteres por token en texto en español/inglés
+CHARS_PER_TOKEN = 4
+
+# Largo máximo del resumen de un turno compactado (caracteres)
+COMPACT_TURN_CHARS = 200
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _compact_turn(role: str, text: str) -> str:
+    """
+    Resumen extractivo de un turno: su primera oración, truncada.
+    Se hace localmente para no pagar una llamada extra a Gemini.
+    """
+    first = _SENTENCE_END_RE.split(text.strip(), maxsplit=1)[0]
+    if len(first) > COMPACT_TURN_CHARS:
+        first = first[:COMPACT_TURN_CHARS].rstrip() + "…"
+    speaker = "Usuario" if role == "user" else "Asistente"
+    return f"{speaker}: {first}"
+
+
+@dataclass
+class Turn:
+    role: str  # "user" | "model"
+    text: str
+    tokens: int
+
+
+@dataclass
+class Session:
+    turns: List[Turn] = field(default_factory=list)
+    summary: List[str] = field(default_factory=list)
+    last_access: float = field(default_factory=time.time)
+
+    @property
+    def tokens(self) -> int:
+        return sum(t.tokens for t in self.turns) + sum(
+            estimate_tokens(s) for s in self.summary
+        )
+
+
+class SessionStore:
+    """
+    Historial de conversación por session_id, en memoria y acotado:
+
+    - Cada sesión se mantiene dentro de SESSION_HISTORY_TOKEN_BUDGET; los
+      turnos más viejos se compactan en un resumen (también acotado).
+    - Se guardan a lo más SESSION_MAX_SESSIONS sesiones (LRU) y expiran
+      tras SESSION_TTL_SECONDS sin actividad.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int | None = None,
+        ttl_seconds: float | None = None,
+        token_budget: int | None = None,
+    ) -> None:
+        self.max_sessions = max_sessions or settings.SESSION_MAX_SESSIONS
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.SESSION_TTL_SECONDS
+        self.token_budget = token_budget or settings.SESSION_HISTORY_TOKEN_BUDGET
+
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+
+    def _get_live(self, session_id: str) -> Session | None:
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        if self.ttl_seconds and time.time() - session.last_access > self.ttl_seconds:
+            del self._sessions[session_id]
+            return None
+        return session
+
+    def get_history(self, session_id: str) -> Tuple[List[Dict[str, str]], str]:
+        """
+        Regresa (turnos como [{"role", "text"}], resumen de turnos compactados).
+        """
+        with self._lock:
+            session = self._get_live(session_id)
+            if session is None:
+                return [], ""
+            self._sessions.move_to_end(session_id)
+            session.last_access = time.time()
+            history = [{"role": t.role, "text": t.text} for t in session.turns]
+            return history, "\n".join(session.summary)
+
+    def append_exchange(self, session_id: str, query: str, answer: str) -> None:
+        """
+        Agrega pregunta y respuesta a la sesión y compacta si excede el presupuesto.
+        """
+        # Ningún turno individual puede ocupar más de la mitad del presupuesto
+        max_turn_chars = self.token_budget * CHARS_PER_TOKEN // 2
+
+        with self._lock:
+            session = self._get_live(session_id)
+            if session is None:
+                session = Session()
+                self._sessions[session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    evicted, _ = self._sessions.popitem(last=False)
+                    sampled_logger.info("Sesión {} desalojada (límite de sesiones)", evicted)
+            self._sessions.move_to_end(session_id)
+            session.last_access = time.time()
+
+            for role, text in (("user", query), ("model", answer)):
+                text = text[:max_turn_chars]
+                session.turns.append(Turn(role=role, text=text, tokens=estimate_tokens(text)))
+
+            self._compact(session)
+
+    def _compact(self, session: Session) -> None:
+        """
+        Mueve los turnos más viejos al resumen hasta entrar en el presupuesto.
+        Siempre conserva el último intercambio completo.
+        """
+        while session.tokens > self.token_budget and len(session.turns) > 2:
+            turn = session.turns.pop(0)
+            session.summary.append(_compact_turn(turn.role, turn.text))
+
+        # El resumen tampoco puede crecer sin límite: descartamos lo más viejo
+        while session.summary and session.tokens > self.token_budget:
+            session.summary.pop(0)
+
+    def clear(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
@@ -0,0 +1,99 @@
+import json
+import secrets
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from src.config import settings
+from src.utils.logger import logger
+
+
+class StoreVersionRegistry:
+    """
+    Versión (contador) de los documentos de cada store, persistida en JSON.
+
+    Se incrementa tras cada upload y alimenta los ETags de /query. Cada worker
+    recarga el archivo cuando cambia su mtime, así que un upload atendido por
+    otro worker también invalida los ETags aquí.
+
+    El archivo lleva además un `epoch` aleatorio que se genera cuando no existe
+    (p.ej. un contenedor nuevo sin data/): los contadores pueden volver a
+    empezar en 0, pero los ETags anteriores ya no coinciden. El archivo se crea
+    en el primer uso, no al instanciar.
+    """
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        self.path = Path(path or settings.STORE_VERSIONS_PATH)
+        self._lock = threading.Lock()
+        self._epoch = ""
+        self._versions: Dict[str, int] = {}
+        self._mtime: float | None = None
+
+    def _refresh(self) -> None:
+        """
+        Recarga el archivo si cambió y, si aún no hay epoch, lo genera y lo
+        persiste. Se llama con el lock tomado.
+        """
+        self._reload_if_changed()
+        if not self._epoch:
+            self._epoch = secrets.token_hex(8)
+            self._write()
+
+    def _reload_if_changed(self) -> None:
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self._epoch, self._versions = data["epoch"], data["versions"]
+            self._mtime = mtime
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            logger.warning("No se pudieron leer las versiones de stores: {}", exc)
+
+    def _write(self) -> None:
+        """
+        Escritura atómica (archivo temporal + rename). Se llama con el lock tomado.
+        """
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".tmp-{secrets.token_hex(4)}")
+            tmp.write_text(
+                json.dumps({"epoch": self._epoch, "versions": self._versions}),
+                encoding="utf-8",
+            )
+            tmp.replace(self.path)
+            self._mtime = self.path.stat().st_mtime
+        except OSError as exc:
+            logger.warning("No se pudieron guardar las versiones de stores: {}", exc)
+
+    def get(self, store_name: str) -> str:
+        """
+        Versión del store como "<epoch>.<contador>" (para ETags).
+        """
+        with self._lock:
+            self._refresh()
+            return f"{self._epoch}.{int(self._versions.get(store_name, 0))}"
+
+    def bump(self, store_name: str) -> int:
+        with self._lock:
+            self._refresh()
+            version = int(self._versions.get(store_name, 0)) + 1
+            self._versions[store_name] = version
+            self._write()
+            return version
+
+    def on_files_uploaded(
+        self,
+        store_name: str,
+        files: List[Tuple[str, str]],
+        affected: List[str],
+    ) -> None:
+        """
+        Listener de FileService: nueva versión de cada store afectado.
+        """
+        for name in affected:
+            self.bump(name)
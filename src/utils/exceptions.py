@@ -8,3 +8,7 @@ class FileTooLargeError(Exception):
 
 class UnsupportedFileTypeError(Exception):
     """Extensión de archivo no soportada para el pipeline."""
+
+
+class GeminiTimeoutError(GeminiServiceError):
+    """La consulta a Gemini excedió el deadline de la petición."""
@@ -1,6 +1,6 @@
 from typing import List
 from src.models.schemas import Source
-from src.utils.logger import logger
+from src.utils.logger import logger, sampled_logger
 
 MAX_SNIPPET_CHARS = 160  # Máximo de caracteres para el snippet
 
@@ -16,7 +16,7 @@ def extract_sources_from_grounding(raw_response) -> List[Source]:
         # 1. Obtener candidatos
         candidates = getattr(raw_response, "candidates", [])
         if not candidates:
-            logger.info("🔎 No hay candidates en la respuesta de Gemini.")
+            sampled_logger.info("🔎 No hay candidates en la respuesta de Gemini.")
             return sources
 
         candidate = candidates[0]
@@ -24,12 +24,12 @@ def extract_sources_from_grounding(raw_response) -> List[Source]:
         # 2. Acceder a grounding_metadata
         grounding = getattr(candidate, "grounding_metadata", None)
         if not grounding:
-            logger.info("🔎 Respuesta sin grounding_metadata.")
+            sampled_logger.info("🔎 Respuesta sin grounding_metadata.")
             return sources
 
         chunks = getattr(grounding, "grounding_chunks", None)
         if not chunks:
-            logger.info("🔎 grounding_metadata sin grounding_chunks.")
+            sampled_logger.info("🔎 grounding_metadata sin grounding_chunks.")
             return sources
 
         # 3. Extraer retrieved_context por chunk
@@ -59,10 +59,11 @@ def extract_sources_from_grounding(raw_response) -> List[Source]:
                 unique[s.filename] = s
 
         cleaned = list(unique.values())
-        logger.info(f"📚 Fuentes extraídas (sin snippet): {cleaned}")
+        sampled_logger.info("📚 Fuentes extraídas: {}", len(cleaned))
+        logger.debug("📚 Fuentes extraídas (sin snippet): {}", cleaned)
 
         return cleaned
 
     except Exception as exc:
-        logger.warning(f"⚠️ Error al parsear grounding_metadata: {exc}")
+        logger.warning("⚠️ Error al parsear grounding_metadata: {}", exc)
         return []
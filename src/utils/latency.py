@@ -0,0 +1,30 @@
+import threading
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+
+class LatencyTracker:
+    """
+    Ventana deslizante de latencias observadas (segundos) para estimar percentiles.
+    """
+
+    def __init__(self, window: int = 500, min_samples: int = 20) -> None:
+        self.min_samples = min_samples
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """
+        Percentil `pct` (0-100) o None si aún no hay muestras suficientes.
+        """
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            samples = np.fromiter(self._samples, dtype=np.float64)
+        return float(np.percentile(samples, pct))
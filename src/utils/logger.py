@@ -1,23 +1,149 @@
-from loguru import logger
+import json
+import random
 import sys
+import traceback
+from typing import Callable, Dict, List, Tuple
+
+from loguru import logger
+
+from src.config import settings
+
+
+class _SampledLogger:
+    """
+    Logger para eventos INFO de alto volumen (uno o más por request).
+    Se muestrea con LOG_SAMPLE_RATE *antes* de construir el record, así que un
+    evento descartado casi no cuesta. Uso: sampled_logger.info("Fuentes: {}", n)
+    """
+
+    def __init__(self, rate: float = 1.0) -> None:
+        self.rate = rate
+
+    def _keep(self) -> bool:
+        return self.rate >= 1.0 or random.random() < self.rate
+
+    def debug(self, message: str, *args, **kwargs) -> None:
+        if self._keep():
+            logger.opt(depth=1).debug(message, *args, **kwargs)
+
+    def info(self, message: str, *args, **kwargs) -> None:
+        if self._keep():
+            logger.opt(depth=1).info(message, *args, **kwargs)
+
+
+sampled_logger = _SampledLogger()
+
+TEXT_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
+    "<level>{level: <8}</level> | "
+    "<magenta>{extra[request_id]}</magenta> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
+    "<level>{message}</level>"
+)
+
+
+def _parse_module_levels(spec: str) -> List[Tuple[str, int]]:
+    """
+    "src.utils.gemini_utils=WARNING,src.services=DEBUG" -> [(prefijo, nivel), ...]
+    ordenado del prefijo más largo al más corto.
+    """
+    levels: List[Tuple[str, int]] = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        module, _, level = item.partition("=")
+        levels.append((module.strip(), logger.level(level.strip().upper()).no))
+    return sorted(levels, key=lambda kv: -len(kv[0]))
+
+
+def _make_filter(default_level: str, module_levels: str) -> Callable[[Dict], bool]:
+    """
+    Filtro de loguru con nivel por módulo.
+    Corre en el hilo que loguea, así que se mantiene barato.
+    """
+    default_no = logger.level(default_level.upper()).no
+    prefixes = _parse_module_levels(module_levels)
+
+    def _filter(record: Dict) -> bool:
+        name = record["name"] or ""
+        min_no = default_no
+        for prefix, level_no in prefixes:
+            if name.startswith(prefix):
+                min_no = level_no
+                break
+
+        return record["level"].no >= min_no
+
+    return _filter
+
+
+def _json_sink(message) -> None:
+    """
+    Sink JSON de una línea por evento. Con LOG_ENQUEUE=true se serializa en
+    el hilo del logger, fuera del camino de la petición.
+    """
+    record = message.record
+    payload = {
+        "ts": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+    }
+    payload.update(record["extra"])
+
+    if record["exception"] is not None:
+        exc_type, exc_value, exc_tb = record["exception"]
+        if exc_type is not None:
+            payload["exception"] = f"{exc_type.__name__}: {exc_value}"
+            # Traza sin variables locales (equivalente a diagnose=False)
+            payload["traceback"] = "".join(
+                traceback.format_exception(exc_type, exc_value, exc_tb)
+            )
+
+    sys.stdout.write(json.dumps(payload, ensure_ascii=False, default=str) + "\n")
+    sys.stdout.flush()
 
 
 def setup_logging() -> None:
     """
     Configura loguru para toda la app.
+
+    LOG_FORMAT=json emite una línea JSON por evento; LOG_MODULE_LEVELS ajusta
+    el nivel por módulo y LOG_SAMPLE_RATE muestrea los eventos de sampled_logger.
+    En prod se desactiva `diagnose` para no volcar variables en las trazas.
     """
     logger.remove()  # Quita handlers por defecto
-    logger.add(
-        sys.stdout,
-        level="INFO",
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
-               "<level>{level: <8}</level> | "
-               "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
-               "<level>{message}</level>",
-        enqueue=True,
-        backtrace=True,
-        diagnose=True,
+    logger.configure(extra={"request_id": "-"})
+
+    is_prod = settings.APP_ENV == "prod"
+    log_filter = _make_filter(settings.LOG_LEVEL, settings.LOG_MODULE_LEVELS)
+    sampled_logger.rate = settings.LOG_SAMPLE_RATE
+    # El nivel del handler es el mínimo configurado en cualquier módulo: loguru
+    # descarta antes de construir el record todo lo que quede por debajo
+    min_level = min(
+        [logger.level(settings.LOG_LEVEL.upper()).no]
+        + [no for _, no in _parse_module_levels(settings.LOG_MODULE_LEVELS)]
     )
 
+    if settings.LOG_FORMAT == "json":
+        logger.add(
+            _json_sink,
+            level=min_level,
+            filter=log_filter,
+            enqueue=settings.LOG_ENQUEUE,
+            backtrace=False,
+            diagnose=False,
+        )
+    else:
+        logger.add(
+            sys.stdout,
+            level=min_level,
+            filter=log_filter,
+            format=TEXT_FORMAT,
+            enqueue=settings.LOG_ENQUEUE,
+            backtrace=not is_prod,
+            diagnose=not is_prod,
+        )
+
     # Ejemplo de logging de arranque
-    logger.info("Logging inicializado")
+    logger.info("Logging inicializado ({}, env={})", settings.LOG_FORMAT, settings.APP_ENV)
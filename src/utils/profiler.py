@@ -0,0 +1,57 @@
+import cProfile
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict
+
+# Solo un perfil a la vez por proceso (cProfile no admite perfiles anidados)
+profiling_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{code.co_name}"
+
+
+def sample_stacks(seconds: float, interval_sec: float) -> Dict[str, int]:
+    """
+    Perfil por muestreo de todos los hilos del worker durante `seconds`.
+
+    Cada `interval_sec` se toman los stacks de todos los hilos (excepto el del
+    muestreador) y se cuentan en formato "collapsed" (raíz;...;hoja), listo
+    para flamegraph.pl / speedscope.
+    """
+    own_ident = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    counts: Counter = Counter()
+
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            counts[";".join(reversed(stack))] += 1
+
+        time.sleep(interval_sec)
+
+    return dict(counts)
+
+
+def write_collapsed(counts: Dict[str, int], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lines = (f"{stack} {n}" for stack, n in sorted(counts.items(), key=lambda kv: -kv[1]))
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def write_pstats(profiler: cProfile.Profile, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(str(path))
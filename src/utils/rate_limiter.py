@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket para las llamadas a Gemini dentro del event loop.
+
+    rate_per_minute <= 0 desactiva el límite. Las llamadas de cobertura
+    (hedging) usan try_acquire() para nunca esperar ni exceder la cuota.
+    El trabajo en segundo plano (hilos) usa acquire_blocking() con una reserva
+    para no consumir la cuota que necesita el tráfico en vivo.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int | None = None) -> None:
+        self.rate_per_sec = rate_per_minute / 60.0
+        self.capacity = float(burst or max(1, int(rate_per_minute / 10)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate_per_sec > 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity,
+            self._tokens + (now - self._updated) * self.rate_per_sec,
+        )
+        self._updated = now
+
+    def try_acquire(self, reserve: float = 0.0) -> bool:
+        """
+        Toma un token si hay disponible (dejando al menos `reserve`); no espera.
+        """
+        if not self.enabled:
+            return True
+
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1 + reserve:
+                self._tokens -= 1
+                return True
+            return False
+
+    def _wait_for(self, reserve: float = 0.0) -> float:
+        with self._lock:
+            return max(1 + reserve - self._tokens, 0.0) / self.rate_per_sec
+
+    async def acquire(self, timeout: float) -> bool:
+        """
+        Espera un token hasta `timeout` segundos. Regresa False si no alcanzó.
+        """
+        deadline = time.monotonic() + timeout
+        while not self.try_acquire():
+            wait = self._wait_for()
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+        return True
+
+    def acquire_blocking(self, reserve: float = 0.0) -> None:
+        """
+        Versión bloqueante para hilos en segundo plano: espera (sin límite)
+        hasta tomar un token dejando al menos `reserve` tokens disponibles.
+        """
+        reserve = min(reserve, self.capacity - 1)
+        while not self.try_acquire(reserve):
+            time.sleep(max(self._wait_for(reserve), 0.01))
+
+
+class HedgeBudget:
+    """
+    Presupuesto de llamadas de cobertura: cada llamada normal acumula `ratio`
+    tokens (hasta `max_tokens`) y cada hedge consume uno. Así los hedges nunca
+    superan esa fracción de las llamadas, con o sin rate limiter configurado.
+    """
+
+    def __init__(self, ratio: float, max_tokens: float = 10.0) -> None:
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def on_call(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            # Tolerancia: 20 x 0.05 suma 0.9999... en punto flotante
+            if self._tokens >= 1 - 1e-9:
+                self._tokens -= 1
+                return True
+            return False
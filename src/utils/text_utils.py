@@ -0,0 +1,74 @@
+import re
+import unicodedata
+from typing import FrozenSet, List
+
+# Palabras vacías en español que no aportan señal para clasificar consultas
+STOPWORDS = {
+    "a", "al", "algo", "como", "con", "cual", "cuales", "cuando", "de", "del",
+    "donde", "el", "en", "es", "esta", "este", "esto", "hay", "la", "las", "le",
+    "les", "lo", "los", "mas", "me", "mi", "mis", "no", "o", "para", "pero",
+    "por", "puedo", "que", "quien", "se", "si", "sin", "sobre", "son", "su",
+    "sus", "tengo", "un", "una", "uno", "unos", "unas", "y", "ya", "yo",
+}
+
+# Tokens que invierten o acotan el sentido de una consulta ("si no trabajo",
+# "artículo 27"): no se pueden descartar al comparar consultas entre sí
+NEGATIONS = {"no", "ni", "nunca", "jamas", "tampoco", "sin"}
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def strip_accents(text: str) -> str:
+    """
+    Elimina acentos y diacríticos ("Qué" -> "Que", "trámite" -> "tramite").
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normaliza una consulta: minúsculas, sin acentos, sin puntuación
+    y con espacios colapsados.
+    """
+    text = strip_accents(text.lower())
+    return _NON_ALNUM_RE.sub(" ", text).strip()
+
+
+def light_stem(token: str, max_len: int = 6) -> str:
+    """
+    Stemming muy ligero por prefijo ("tramites" y "tramite" -> "tramit").
+    Suficiente para clasificar sin depender de librerías de NLP.
+    """
+    return token[:max_len]
+
+
+def is_guard_token(token: str) -> bool:
+    """
+    True para negaciones y tokens con dígitos (números de artículo, montos, años).
+    """
+    return token in NEGATIONS or any(ch.isdigit() for ch in token)
+
+
+def guard_tokens(text: str) -> FrozenSet[str]:
+    """
+    Conjunto de negaciones y números de una consulta. Dos consultas solo son
+    equivalentes si este conjunto coincide exactamente.
+    """
+    return frozenset(t for t in normalize_query(text).split() if is_guard_token(t))
+
+
+def tokenize(text: str, drop_stopwords: bool = True, keep_guards: bool = False) -> List[str]:
+    """
+    Tokeniza texto ya sea crudo o normalizado. Opcionalmente descarta stopwords;
+    con keep_guards=True se conservan negaciones y números aunque sean stopwords
+    o de un solo carácter.
+    """
+    tokens = normalize_query(text).split()
+    if drop_stopwords:
+        tokens = [
+            t
+            for t in tokens
+            if (t not in STOPWORDS and len(t) > 1) or (keep_guards and is_guard_token(t))
+        ]
+    return tokens
@@ -0,0 +1,7 @@
+import os
+import sys
+from pathlib import Path
+
+# Los tests importan `src.*` desde la raíz del repo y no necesitan una API key real
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
@@ -0,0 +1,37 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.admin import admin_router, is_admin_token
+
+TOKEN = "s3cret"
+
+
+def test_is_admin_token(monkeypatch):
+    monkeypatch.setattr("src.api.admin.settings.PROFILING_ADMIN_TOKEN", TOKEN)
+
+    assert is_admin_token(TOKEN)
+    assert not is_admin_token("otro")
+    assert not is_admin_token(None)
+    # No ASCII: debe rechazarse, no levantar TypeError
+    assert not is_admin_token("contraseña")
+
+
+def test_no_token_configured_rejects_everything(monkeypatch):
+    monkeypatch.setattr("src.api.admin.settings.PROFILING_ADMIN_TOKEN", None)
+    assert not is_admin_token(TOKEN)
+
+
+def test_sample_interval_has_a_lower_bound(monkeypatch):
+    monkeypatch.setattr("src.api.admin.settings.PROFILING_ADMIN_TOKEN", TOKEN)
+    app = FastAPI()
+    app.include_router(admin_router)
+    client = TestClient(app)
+
+    resp = client.post(
+        "/admin/profiling/sample?seconds=1&interval_ms=0.001",
+        headers={"X-Admin-Token": TOKEN},
+    )
+    assert resp.status_code == 422
+
+    resp = client.post("/admin/profiling/sample", headers={"X-Admin-Token": "otro"})
+    assert resp.status_code == 403
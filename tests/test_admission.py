@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.api.admission import AdmissionController, AdmissionMiddleware, RouteLimits
+
+
+def _controller(query_inflight=1, query_queue=10, upload_inflight=1, upload_queue=10, total=1, timeout=5.0):
+    return AdmissionController(
+        routes={
+            "query": RouteLimits(max_inflight=query_inflight, max_queue=query_queue, priority=0),
+            "upload": RouteLimits(max_inflight=upload_inflight, max_queue=upload_queue, priority=1),
+        },
+        max_inflight_total=total,
+        queue_timeout_seconds=timeout,
+        retry_after_seconds=3,
+    )
+
+
+def test_full_queue_is_shed_immediately():
+    async def scenario():
+        controller = _controller(query_queue=1)
+        await controller.acquire("query", "a")
+        waiting = asyncio.create_task(controller.acquire("query", "a"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(HTTPException) as exc:
+            await controller.acquire("query", "a")
+
+        assert exc.value.status_code == 503
+        assert exc.value.headers["Retry-After"] == "3"
+        waiting.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_zero_queue_admits_when_idle():
+    async def scenario():
+        controller = _controller(upload_queue=0)
+
+        await controller.acquire("upload", "a")
+        assert controller.stats()["upload"] == {"inflight": 1, "queued": 0}
+
+        with pytest.raises(HTTPException):
+            await controller.acquire("upload", "b")
+
+        controller.release("upload")
+        await controller.acquire("upload", "b")
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_is_shed():
+    async def scenario():
+        controller = _controller(timeout=0.05)
+        await controller.acquire("query", "a")
+
+        with pytest.raises(HTTPException):
+            await controller.acquire("query", "b")
+        assert controller.stats()["query"] == {"inflight": 1, "queued": 0}
+
+    asyncio.run(scenario())
+
+
+def test_round_robin_between_consumers():
+    async def scenario():
+        controller = _controller()
+        await controller.acquire("query", "busy")
+        order = []
+
+        async def request(consumer):
+            await controller.acquire("query", consumer)
+            order.append(consumer)
+            controller.release("query")
+
+        tasks = [asyncio.create_task(request(c)) for c in ["a", "a", "a", "b"]]
+        await asyncio.sleep(0)
+        controller.release("query")
+        await asyncio.gather(*tasks)
+
+        # "b" no espera detrás de todas las peticiones de "a"
+        assert order == ["a", "b", "a", "a"]
+
+    asyncio.run(scenario())
+
+
+def test_queries_are_dispatched_before_uploads():
+    async def scenario():
+        controller = _controller(upload_inflight=1, total=1)
+        await controller.acquire("query", "x")
+        order = []
+
+        async def request(route):
+            await controller.acquire(route, "c")
+            order.append(route)
+            controller.release(route)
+
+        upload = asyncio.create_task(request("upload"))
+        await asyncio.sleep(0)
+        query = asyncio.create_task(request("query"))
+        await asyncio.sleep(0)
+        controller.release("query")
+        await asyncio.gather(upload, query)
+
+        assert order == ["query", "upload"]
+
+    asyncio.run(scenario())
+
+
+def test_middleware_sheds_uploads_before_reading_the_body():
+    async def scenario():
+        # Sin cola de uploads y con la capacidad ocupada
+        controller = _controller(upload_queue=0)
+        await controller.acquire("upload", "someone")
+        body_read = False
+        sent = []
+
+        async def app(scope, receive, send):
+            raise AssertionError("la ruta no debe ejecutarse")
+
+        async def receive():
+            nonlocal body_read
+            body_read = True
+            return {"type": "http.request", "body": b"x" * 1024, "more_body": True}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/upload-files/fileSearchStores/leyes",
+            "headers": [],
+            "query_string": b"",
+            "client": ("10.0.0.1", 1234),
+        }
+        await AdmissionMiddleware(app, controller)(scope, receive, send)
+
+        assert sent[0]["status"] == 503
+        assert not body_read
+
+    asyncio.run(scenario())
@@ -0,0 +1,120 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.answer_store import AnswerStore, answer_key
+from src.services.prompt_service import GenerationSettings, ModelTier
+from src.services.store_versions import StoreVersionRegistry
+
+STORE = "fileSearchStores/leyes"
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("¿Puedo retirar si trabajo?", "¿Puedo retirar si no trabajo?"),
+        ("artículo 5 de la ley", "artículo 7 de la ley"),
+        ("artículo 27 de la ley", "artículo 28 de la ley"),
+    ],
+)
+def test_answer_key_keeps_negations_and_numbers(a, b):
+    assert answer_key(a) != answer_key(b)
+
+
+def test_answer_key_ignores_case_accents_and_punctuation():
+    assert answer_key("¿Qué requisitos hay para el RETIRO?") == answer_key("que requisitos hay para el retiro")
+    assert answer_key("¿Artículo 5 de la ley?") == "articulo 5 ley"
+
+
+def test_write_and_get(tmp_path):
+    store = AnswerStore(tmp_path)
+    records = [
+        {
+            "key": answer_key(q),
+            "query": q,
+            "answer": answer,
+            "sources": [{"filename": "ley.pdf", "page": None, "snippet": ""}],
+        }
+        for q, answer in [
+            ("¿Puedo retirar si trabajo?", "sí"),
+            ("¿Puedo retirar si no trabajo?", "no"),
+        ]
+    ]
+    store.write(STORE, "default", records, [r["query"] for r in records])
+
+    assert store.get(STORE, "default", "puedo retirar si trabajo")[0] == "sí"
+    assert store.get(STORE, "default", "Puedo retirar si NO trabajo")[0] == "no"
+    assert store.get(STORE, "default", "artículo 5 de la ley") is None
+    assert store.get(STORE, "leyes", "puedo retirar si trabajo") is None
+
+
+def _grounded(text):
+    context = SimpleNamespace(title="ley.pdf", uri=None, text="")
+    metadata = SimpleNamespace(grounding_chunks=[SimpleNamespace(retrieved_context=context)])
+    return SimpleNamespace(text=text, candidates=[SimpleNamespace(grounding_metadata=metadata)])
+
+
+class _FakeGemini:
+    def __init__(self):
+        self.answer = "v1"
+        self.on_call = None
+
+    def query_with_rag(self, **kwargs):
+        if self.on_call:
+            self.on_call()
+        return _grounded(self.answer)
+
+
+class _FakePrompts:
+    def get_profile_settings(self, profile):
+        return "", GenerationSettings(primary=ModelTier())
+
+
+def test_stale_rebuild_is_discarded(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.services.answer_store.settings.ANSWER_STORE_AUTO_REBUILD", False)
+    store = AnswerStore(tmp_path)
+    gemini = _FakeGemini()
+    store.build(STORE, "default", ["requisitos de pensión"], gemini, _FakePrompts())
+    listener = store.make_upload_listener(gemini, _FakePrompts())
+
+    listener(STORE, [], [STORE])
+    generation = store.generation(STORE)
+    assert store.get(STORE, "default", "requisitos de pensión") is None
+
+    # Un segundo upload llega mientras se reconstruye con la generación anterior
+    gemini.on_call = lambda: listener(STORE, [], [STORE])
+    assert store.build(STORE, "default", ["requisitos de pensión"], gemini, _FakePrompts(), generation=generation) is None
+    assert store.get(STORE, "default", "requisitos de pensión") is None
+
+    # La reconstrucción con la generación vigente sí se publica
+    gemini.on_call = None
+    gemini.answer = "v2"
+    store.build(STORE, "default", ["requisitos de pensión"], gemini, _FakePrompts(), generation=store.generation(STORE))
+    assert store.get(STORE, "default", "requisitos de pensión")[0] == "v2"
+
+
+def test_upload_in_another_worker_stops_serving_until_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.services.answer_store.settings.ANSWER_STORE_AUTO_REBUILD", False)
+    versions_path = tmp_path / "versions.json"
+    worker_a = AnswerStore(tmp_path / "answers", versions=StoreVersionRegistry(versions_path))
+    worker_b_versions = StoreVersionRegistry(versions_path)
+    worker_b = AnswerStore(tmp_path / "answers", versions=worker_b_versions)
+
+    worker_a.build(STORE, "default", ["requisitos de pensión"], _FakeGemini(), _FakePrompts())
+    worker_b.load_all()
+    assert worker_b.get(STORE, "default", "requisitos de pensión")[0] == "v1"
+
+    assert worker_a.get(STORE, "default", "requisitos de pensión")[0] == "v1"
+
+    # El upload lo atiende el worker B: A deja de servir la respuesta vieja
+    worker_b_versions.on_files_uploaded(STORE, [], [STORE])
+    worker_b.make_upload_listener(_FakeGemini(), _FakePrompts())(STORE, [], [STORE])
+    assert worker_a.get(STORE, "default", "requisitos de pensión") is None
+
+    # Cuando B termina de reconstruir, A recarga la carpeta nueva
+    rebuilt = _FakeGemini()
+    rebuilt.answer = "v2"
+    time.sleep(0.01)
+    worker_b.build(STORE, "default", ["requisitos de pensión"], rebuilt, _FakePrompts())
+    assert worker_a.get(STORE, "default", "requisitos de pensión")[0] == "v2"
@@ -0,0 +1,226 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from src.api import routes
+from src.services.answer_store import AnswerStore
+from src.services.gemini_service import GeminiService
+from src.services.query_cache import SimilarityQueryCache
+from src.services.session_service import SessionStore
+from src.services.store_versions import StoreVersionRegistry
+
+STORE = "fileSearchStores/leyes"
+CHEAP_MODEL = "gemini-2.5-flash-lite"
+
+
+def grounded(text, filename="ley.pdf"):
+    context = SimpleNamespace(title=filename, uri=None, text="")
+    metadata = SimpleNamespace(grounding_chunks=[SimpleNamespace(retrieved_context=context)])
+    return SimpleNamespace(text=text, candidates=[SimpleNamespace(grounding_metadata=metadata)])
+
+
+class FakeModels:
+    """
+    Sustituye client.aio.models: `handlers[model]` decide la respuesta de cada modelo.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.requests = []
+        self.handlers = {}
+
+    async def generate_content(self, model, contents, config):
+        self.calls.append(model)
+        self.requests.append((model, contents, config))
+        handler = self.handlers.get(model)
+        if handler is None:
+            return grounded(f"respuesta de {model}")
+        return await handler()
+
+
+@pytest.fixture
+def fake_models():
+    return FakeModels()
+
+
+@pytest.fixture
+def store_versions(tmp_path):
+    return StoreVersionRegistry(tmp_path / "versions.json")
+
+
+@pytest.fixture
+def client(tmp_path, fake_models, store_versions):
+    gemini = GeminiService()
+    gemini.client = SimpleNamespace(aio=SimpleNamespace(models=fake_models))
+    query_cache = SimilarityQueryCache()
+    answer_store = AnswerStore(tmp_path / "answers", versions=store_versions)
+
+    app.dependency_overrides = {
+        routes.get_gemini_service: lambda: gemini,
+        routes.get_query_cache: lambda: query_cache,
+        routes.get_answer_store: lambda: answer_store,
+        routes.get_store_versions: lambda: store_versions,
+    }
+    yield TestClient(app)
+    app.dependency_overrides = {}
+
+
+def test_cheap_tier_failure_escalates_to_primary(client, fake_models):
+    async def unavailable():
+        raise RuntimeError("503 model overloaded")
+
+    fake_models.handlers[CHEAP_MODEL] = unavailable
+
+    resp = client.post(f"/query/{STORE}", json={"query": "requisitos de pensión"})
+
+    assert resp.status_code == 200
+    assert fake_models.calls[0] == CHEAP_MODEL
+    assert fake_models.calls[-1] != CHEAP_MODEL
+    assert resp.json()["sources"][0]["filename"] == "ley.pdf"
+
+
+def test_cheap_tier_without_sources_escalates(client, fake_models):
+    async def ungrounded():
+        return SimpleNamespace(text="sin fuentes", candidates=[])
+
+    fake_models.handlers[CHEAP_MODEL] = ungrounded
+
+    resp = client.post(f"/query/{STORE}", json={"query": "requisitos de pensión"})
+
+    assert resp.status_code == 200
+    assert len(fake_models.calls) == 2
+    assert resp.json()["answer"] != "sin fuentes"
+
+
+def test_query_without_store_is_rejected(client, fake_models):
+    resp = client.post("/query/", json={"query": "requisitos de pensión"})
+
+    assert resp.status_code == 400
+    assert fake_models.calls == []
+
+
+# --------- ETag / compresión / compact --------- #
+
+QUERY = {"query": "¿Cuáles son los requisitos para la pensión por vejez?", "prompt_profile": "leyes"}
+
+
+def test_repeated_query_gets_304(client, fake_models):
+    first = client.post(f"/query/{STORE}", json=QUERY)
+    etag = first.headers["etag"]
+
+    again = client.post(f"/query/{STORE}", json=QUERY, headers={"If-None-Match": etag})
+
+    assert again.status_code == 304
+    assert again.content == b""
+    assert len(fake_models.calls) == 1
+
+
+def test_wildcard_if_none_match_is_not_a_304(client, fake_models):
+    resp = client.post(f"/query/{STORE}", json=QUERY, headers={"If-None-Match": "*"})
+
+    assert resp.status_code == 200
+    assert len(fake_models.calls) == 1
+
+
+def test_etag_changes_after_upload(client, store_versions):
+    etag = client.post(f"/query/{STORE}", json=QUERY).headers["etag"]
+
+    store_versions.on_files_uploaded(STORE, [], [STORE])
+    resp = client.post(f"/query/{STORE}", json=QUERY, headers={"If-None-Match": etag})
+
+    assert resp.status_code == 200
+    assert resp.headers["etag"] != etag
+
+
+def test_etag_changes_with_model_config(client, monkeypatch):
+    etag = client.post(f"/query/{STORE}", json=QUERY).headers["etag"]
+
+    monkeypatch.setattr("src.services.prompt_service.settings.GEMINI_MODEL", "gemini-2.5-pro")
+    resp = client.post(f"/query/{STORE}", json=QUERY, headers={"If-None-Match": etag})
+
+    assert resp.status_code == 200
+
+
+def test_etag_changes_when_versions_file_is_lost(client, tmp_path):
+    etag = client.post(f"/query/{STORE}", json=QUERY).headers["etag"]
+
+    # Contenedor nuevo: los contadores vuelven a 0 pero el epoch cambia
+    fresh = StoreVersionRegistry(tmp_path / "fresh" / "versions.json")
+    app.dependency_overrides[routes.get_store_versions] = lambda: fresh
+    resp = client.post(f"/query/{STORE}", json=QUERY, headers={"If-None-Match": etag})
+
+    assert resp.status_code == 200
+
+
+def test_session_queries_have_no_etag(client):
+    resp = client.post(f"/query/{STORE}", json={**QUERY, "session_id": "s1"})
+
+    assert resp.status_code == 200
+    assert "etag" not in resp.headers
+
+
+def test_compact_omits_defaults(client):
+    full = client.post(f"/query/{STORE}", json=QUERY).json()
+    compact = client.post(f"/query/{STORE}?compact=true", json=QUERY).json()
+
+    assert full["sources"][0] == {"filename": "ley.pdf", "page": None, "snippet": ""}
+    assert "session_id" in full
+    assert compact["sources"][0] == {"filename": "ley.pdf"}
+    assert "session_id" not in compact
+
+
+def test_gzip_is_negotiated(client, fake_models, monkeypatch):
+    monkeypatch.setattr("src.api.responses.settings.RESPONSE_COMPRESSION_MIN_BYTES", 10)
+
+    resp = client.post(f"/query/{STORE}", json=QUERY, headers={"Accept-Encoding": "gzip"})
+
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers["vary"] == "Accept-Encoding"
+    assert resp.json()["answer"].startswith("respuesta de")
+
+
+def test_shed_responses_carry_cors_headers(client, monkeypatch):
+    controller = routes.get_admission_controller()
+    monkeypatch.setattr(controller, "enabled", True)
+    monkeypatch.setitem(controller._inflight, "query", controller.routes["query"].max_inflight)
+    monkeypatch.setitem(controller._queued, "query", controller.routes["query"].max_queue)
+
+    resp = client.post(
+        f"/query/{STORE}",
+        json={"query": "requisitos de pensión"},
+        headers={"Origin": "https://app.example.com"},
+    )
+
+    assert resp.status_code == 503
+    assert resp.headers["access-control-allow-origin"]
+    assert "retry-after" in resp.headers["access-control-expose-headers"].lower()
+
+
+# --------- Sesiones --------- #
+
+
+def test_session_history_reaches_the_model_as_turns(client, fake_models):
+    sessions = SessionStore(max_sessions=10, ttl_seconds=0, token_budget=100)
+    for i in range(4):
+        sessions.append_exchange("s1", f"Pregunta {i}. " + "detalle " * 20, f"Respuesta {i}. " + "texto " * 20)
+    app.dependency_overrides[routes.get_session_store] = lambda: sessions
+
+    resp = client.post(
+        f"/query/{STORE}",
+        json={"query": "¿Y para la pensión por viudez?", "session_id": "s1"},
+    )
+
+    assert resp.status_code == 200
+    _, contents, config = fake_models.requests[-1]
+    # Turnos previos completos + la consulta actual, en orden
+    assert [c.role for c in contents] == ["user", "model", "user"]
+    assert contents[0].parts[0].text.startswith("Pregunta 3.")
+    assert contents[1].parts[0].text.startswith("Respuesta 3.")
+    assert contents[-1].parts[0].text == "¿Y para la pensión por viudez?"
+    # Lo anterior llega resumido en la instrucción de sistema
+    assert "Resumen de la conversación previa" in config.system_instruction
+    assert "Usuario: Pregunta 2." in config.system_instruction
+    # El intercambio nuevo queda en la sesión
+    assert sessions.get_history("s1")[0][-2]["text"] == "¿Y para la pensión por viudez?"
@@ -0,0 +1,25 @@
+from src.services.file_service import FileService, affected_stores
+
+
+def test_affected_stores_include_general_once(monkeypatch):
+    monkeypatch.setattr("src.services.file_service.settings.GEMINI_STORE_GENERAL", "stores/general-1")
+
+    assert affected_stores("stores/leyes-1") == ["stores/leyes-1", "general", "stores/general-1"]
+    assert affected_stores("stores/general-1") == ["stores/general-1", "general"]
+
+
+def test_listeners_get_the_same_affected_stores(monkeypatch):
+    monkeypatch.setattr("src.services.file_service.settings.GEMINI_STORE_GENERAL", None)
+    calls = []
+
+    def failing(store_name, files, affected):
+        raise RuntimeError("boom")
+
+    service = FileService(
+        gemini_service=None,
+        upload_listeners=[failing, lambda *args: calls.append(args)],
+    )
+    service._notify_listeners("stores/leyes-1", [("ley.txt", "/tmp/ley.txt")])
+
+    # Un listener que falla no impide avisar a los demás
+    assert calls == [("stores/leyes-1", [("ley.txt", "/tmp/ley.txt")], ["stores/leyes-1", "general"])]
@@ -0,0 +1,113 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.gemini_service import GeminiService
+from src.utils.exceptions import GeminiServiceError, GeminiTimeoutError
+
+STORE = "fileSearchStores/leyes"
+
+
+class SlowThenFast:
+    """
+    client.aio.models falso: la llamada i-ésima tarda delays[i] segundos.
+    """
+
+    def __init__(self, *delays):
+        self.delays = list(delays)
+        self.calls = 0
+
+    async def generate_content(self, model, contents, config):
+        delay = self.delays[min(self.calls, len(self.delays) - 1)]
+        self.calls += 1
+        await asyncio.sleep(delay)
+        return SimpleNamespace(text=f"llamada {self.calls}", delay=delay)
+
+
+def _service(models, monkeypatch, hedge=True, ratio=1.0):
+    monkeypatch.setattr("src.services.gemini_service.settings.QUERY_HEDGE_ENABLED", hedge)
+    monkeypatch.setattr("src.services.gemini_service.settings.QUERY_HEDGE_MAX_RATIO", ratio)
+    service = GeminiService()
+    service.client = SimpleNamespace(aio=SimpleNamespace(models=models))
+    # Historial de latencias: p95 ~ 0.05s
+    for _ in range(50):
+        service.latency().record(0.05)
+    return service
+
+
+def _query(service, **kwargs):
+    return asyncio.run(
+        service.aquery_with_rag(
+            store_name=STORE,
+            query="requisitos de pensión",
+            system_instruction="",
+            **kwargs,
+        )
+    )
+
+
+def test_hedge_returns_fastest_call(monkeypatch):
+    models = SlowThenFast(2.0, 0.01)
+    service = _service(models, monkeypatch)
+
+    response = _query(service, deadline_seconds=1.0)
+
+    assert models.calls == 2
+    assert response.delay == 0.01
+
+
+def test_cancelled_hedge_loser_records_latency(monkeypatch):
+    models = SlowThenFast(2.0, 0.01)
+    service = _service(models, monkeypatch)
+
+    _query(service, deadline_seconds=1.0)
+
+    # 50 muestras previas + ganador + perdedor cancelado (>= p95)
+    samples = list(service.latency()._samples)
+    assert len(samples) == 52
+    assert max(samples) >= 0.05
+
+
+def test_deadline_raises_timeout_and_records_latency(monkeypatch):
+    models = SlowThenFast(5.0)
+    service = _service(models, monkeypatch, hedge=False)
+
+    with pytest.raises(GeminiTimeoutError):
+        _query(service, deadline_seconds=0.2)
+
+    # El deadline corre desde antes de lanzar la llamada
+    assert max(service.latency()._samples) >= 0.15
+
+
+def test_hedge_budget_limits_hedges_without_rate_limit(monkeypatch):
+    models = SlowThenFast(0.3)
+    service = _service(models, monkeypatch, ratio=0.05)
+    assert not service.rate_limiter.enabled
+
+    for _ in range(5):
+        _query(service, deadline_seconds=1.0)
+
+    # 5 llamadas x 0.05 no alcanzan para un solo hedge
+    assert models.calls == 5
+
+
+def test_latency_is_tracked_per_model(monkeypatch):
+    models = SlowThenFast(0.01)
+    service = _service(models, monkeypatch, hedge=False)
+
+    _query(service, model="gemini-2.5-flash-lite")
+
+    assert len(service.latency("gemini-2.5-flash-lite")._samples) == 1
+    assert len(service.latency()._samples) == 50
+
+
+def test_errors_raise_service_error(monkeypatch):
+    class Failing:
+        async def generate_content(self, model, contents, config):
+            raise RuntimeError("500 internal")
+
+    service = _service(Failing(), monkeypatch, hedge=False)
+
+    with pytest.raises(GeminiServiceError):
+        _query(service)
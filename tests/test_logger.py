@@ -0,0 +1,94 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from loguru import logger
+
+from src.utils.logger import _json_sink, _make_filter, _parse_module_levels, _SampledLogger
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _record(name, level):
+    return {"name": name, "level": logger.level(level)}
+
+
+def test_parse_module_levels_orders_longest_prefix_first():
+    levels = _parse_module_levels(" src.services=DEBUG, src.services.gemini_service=warning ,,")
+
+    assert levels == [
+        ("src.services.gemini_service", logger.level("WARNING").no),
+        ("src.services", logger.level("DEBUG").no),
+    ]
+    assert _parse_module_levels("") == []
+
+
+def test_filter_applies_the_most_specific_module_level():
+    log_filter = _make_filter("info", "src.services=DEBUG,src.services.gemini_service=ERROR")
+
+    assert log_filter(_record("src.services.router_service", "DEBUG"))
+    assert not log_filter(_record("src.services.gemini_service", "WARNING"))
+    assert log_filter(_record("src.services.gemini_service", "ERROR"))
+    # Fuera de los prefijos rige el nivel por defecto
+    assert not log_filter(_record("src.api.routes", "DEBUG"))
+    assert log_filter(_record("src.api.routes", "INFO"))
+
+
+def test_json_sink_writes_one_line_with_extra_and_exception(capsys):
+    handler = logger.add(_json_sink, level="DEBUG")
+    try:
+        with logger.contextualize(request_id="abc"):
+            logger.info("hola {}", "mundo")
+            try:
+                raise ValueError("falló")
+            except ValueError:
+                logger.exception("error")
+    finally:
+        logger.remove(handler)
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2
+    first, second = (json.loads(line) for line in lines)
+
+    assert first["message"] == "hola mundo"
+    assert first["level"] == "INFO"
+    assert first["request_id"] == "abc"
+    assert first["function"] == "test_json_sink_writes_one_line_with_extra_and_exception"
+    assert "exception" not in first
+
+    assert second["exception"] == "ValueError: falló"
+    assert "Traceback" in second["traceback"]
+
+
+def test_sampled_logger_drops_or_keeps_by_rate():
+    messages = []
+    handler = logger.add(lambda m: messages.append(m.record), level="DEBUG")
+    try:
+        _SampledLogger(rate=0.0).info("descartado")
+        _SampledLogger(rate=1.0).info("conservado {}", 1)
+    finally:
+        logger.remove(handler)
+
+    assert [r["message"] for r in messages] == ["conservado 1"]
+    # depth=1: el record apunta a quien llamó, no a _SampledLogger
+    assert messages[0]["function"] == "test_sampled_logger_drops_or_keeps_by_rate"
+
+
+def test_startup_logs_are_json_from_the_first_line():
+    env = {**os.environ, "LOG_FORMAT": "json", "LOG_ENQUEUE": "false"}
+    result = subprocess.run(
+        [sys.executable, "-c", "import main"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+    assert result.returncode == 0, result.stderr
+    lines = result.stdout.splitlines()
+    assert lines
+    for line in lines:
+        json.loads(line)
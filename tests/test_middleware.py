@@ -0,0 +1,64 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from loguru import logger
+
+from src.api.middleware import RequestContextMiddleware
+
+
+def _app():
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        logger.info("dentro de la ruta")
+        return {"ok": True}
+
+    return app
+
+
+def _capture():
+    records = []
+    handler = logger.add(lambda m: records.append(m.record), level="DEBUG")
+    return records, handler
+
+
+def test_valid_request_id_is_echoed_and_contextualized():
+    records, handler = _capture()
+    try:
+        resp = TestClient(_app()).get("/ping", headers={"X-Request-ID": "abc-123.x_y"})
+    finally:
+        logger.remove(handler)
+
+    assert resp.status_code == 200
+    assert resp.headers["x-request-id"] == "abc-123.x_y"
+
+    route_logs = [r for r in records if r["message"] == "dentro de la ruta"]
+    assert route_logs and route_logs[0]["extra"]["request_id"] == "abc-123.x_y"
+    # La línea de acceso también lleva el request_id
+    access_logs = [r for r in records if r["message"].startswith("GET /ping -> 200")]
+    assert access_logs and access_logs[0]["extra"]["request_id"] == "abc-123.x_y"
+
+
+def test_invalid_request_id_is_replaced():
+    records, handler = _capture()
+    try:
+        resp = TestClient(_app()).get("/ping", headers={"X-Request-ID": "bad id; <script>"})
+    finally:
+        logger.remove(handler)
+
+    request_id = resp.headers["x-request-id"]
+    assert request_id != "bad id; <script>"
+    assert len(request_id) == 32 and request_id.isalnum()
+
+    route_logs = [r for r in records if r["message"] == "dentro de la ruta"]
+    assert route_logs[0]["extra"]["request_id"] == request_id
+
+
+def test_missing_request_id_gets_a_new_one():
+    client = TestClient(_app())
+
+    first = client.get("/ping").headers["x-request-id"]
+    second = client.get("/ping").headers["x-request-id"]
+
+    assert first and second and first != second
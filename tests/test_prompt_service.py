@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from src.services import prompt_service
+from src.services.prompt_service import PromptService
+
+
+@pytest.fixture
+def prompts(tmp_path, monkeypatch):
+    prompt = tmp_path / "base_prompt.txt"
+    prompt.write_text("Eres un asistente.", encoding="utf-8")
+    config = tmp_path / "prompt_config.yaml"
+    config.write_text(
+        "profiles:\n"
+        "  default:\n"
+        f"    system_instruction_file: \"{prompt}\"\n"
+        "    generation_config:\n"
+        "      temperature: 0.2\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setattr("src.prompting.prompt_manager.PROMPT_CONFIG_PATH", config)
+    return config, prompt
+
+
+def _touch_later(path, text):
+    stat = os.stat(path)
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_profile_is_loaded_once(prompts, monkeypatch):
+    service = PromptService()
+    calls = []
+    real = prompt_service.load_prompt
+    monkeypatch.setattr(
+        prompt_service, "load_prompt", lambda profile: calls.append(profile) or real(profile)
+    )
+
+    for _ in range(5):
+        service.get_profile_settings("default")
+        service.profile_fingerprint("default")
+
+    assert calls == ["default"]
+
+
+def test_prompt_edit_reloads_profile(prompts):
+    _, prompt = prompts
+    service = PromptService()
+    before = service.profile_fingerprint("default")
+
+    _touch_later(prompt, "Eres un asistente experto en pensiones.")
+
+    assert service.profile_fingerprint("default") != before
+    assert service.get_profile_settings("default")[0] == "Eres un asistente experto en pensiones."
+
+
+def test_config_edit_reloads_profile(prompts):
+    config, _ = prompts
+    service = PromptService()
+    before = service.profile_fingerprint("default")
+
+    _touch_later(config, config.read_text(encoding="utf-8").replace("0.2", "0.7"))
+
+    assert service.profile_fingerprint("default") != before
+    assert service.get_profile_settings("default")[1].primary.generation_config["temperature"] == 0.7
+
+
+def test_model_change_changes_fingerprint(prompts, monkeypatch):
+    service = PromptService()
+    before = service.profile_fingerprint("default")
+
+    monkeypatch.setattr("src.services.prompt_service.settings.GEMINI_MODEL", "otro-modelo")
+
+    assert service.profile_fingerprint("default") != before
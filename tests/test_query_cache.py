@@ -0,0 +1,66 @@
+import pytest
+
+from src.models.schemas import Source
+from src.services.query_cache import SimilarityQueryCache
+
+STORE = "fileSearchStores/leyes"
+
+# Pares que comparten casi todos los n-gramas pero piden cosas distintas
+DIFFERENT_PAIRS = [
+    ("¿Puedo retirar si trabajo?", "¿Puedo retirar si no trabajo?"),
+    ("artículo 5 de la ley", "artículo 7 de la ley"),
+    ("artículo 27 de la ley", "artículo 28 de la ley"),
+]
+
+
+@pytest.fixture
+def cache():
+    return SimilarityQueryCache(threshold=0.85, dim=1024, max_entries=10, max_buckets=4, ttl_seconds=0)
+
+
+def _put(cache, query, answer="respuesta"):
+    cache.put(STORE, "default", query, answer, [Source(filename="ley.pdf")])
+
+
+@pytest.mark.parametrize("cached, asked", DIFFERENT_PAIRS + [(b, a) for a, b in DIFFERENT_PAIRS])
+def test_negations_and_numbers_are_not_equivalent(cache, cached, asked):
+    _put(cache, cached)
+    assert cache.get(STORE, "default", asked) is None
+
+
+def test_paraphrase_hits(cache):
+    _put(cache, "¿Qué requisitos hay para la pensión?", "los requisitos son...")
+
+    hit = cache.get(STORE, "default", "requisitos para la pension")
+
+    assert hit is not None
+    assert hit.answer == "los requisitos son..."
+    assert hit.similarity >= 0.85
+
+
+def test_short_and_long_phrasing_hit(cache):
+    _put(cache, "requisitos retiro afore", "los requisitos del retiro son...")
+
+    hit = cache.get(STORE, "default", "¿Qué requisitos hay para retirar de la Afore?")
+
+    assert hit is not None
+    assert hit.answer == "los requisitos del retiro son..."
+
+
+def test_same_numbers_in_any_order_hit(cache):
+    _put(cache, "artículo 27 y 28 de la ley")
+    assert cache.get(STORE, "default", "ley artículo 28 y 27") is not None
+
+
+def test_different_answer_per_variant(cache):
+    _put(cache, "artículo 5 de la ley", "art 5")
+    _put(cache, "artículo 7 de la ley", "art 7")
+
+    assert cache.get(STORE, "default", "¿artículo 7 de la ley?").answer == "art 7"
+    assert cache.get(STORE, "default", "¿artículo 5 de la ley?").answer == "art 5"
+
+
+def test_invalidate_store(cache):
+    _put(cache, "requisitos de pensión")
+    cache.invalidate_store(STORE)
+    assert cache.get(STORE, "default", "requisitos de pensión") is None
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from src.utils.rate_limiter import AsyncRateLimiter, HedgeBudget
+
+
+def test_disabled_limiter_always_grants():
+    limiter = AsyncRateLimiter(0)
+    assert not limiter.enabled
+    assert all(limiter.try_acquire() for _ in range(100))
+
+
+def test_burst_then_refuses():
+    limiter = AsyncRateLimiter(60, burst=2)
+    assert limiter.try_acquire()
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+
+
+def test_acquire_gives_up_past_timeout():
+    limiter = AsyncRateLimiter(6, burst=1)  # 1 token cada 10 s
+    assert limiter.try_acquire()
+    assert asyncio.run(limiter.acquire(timeout=0.05)) is False
+
+
+def test_blocking_acquire_leaves_reserve():
+    limiter = AsyncRateLimiter(6000, burst=4)  # 100 tokens/s
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.acquire_blocking(reserve=2)
+
+    # Solo 2 tokens sobre la reserva: el tercero tuvo que esperar el refill
+    assert time.monotonic() - start >= 0.005
+    assert limiter.try_acquire()
+
+
+def test_hedge_budget_is_a_fraction_of_calls():
+    budget = HedgeBudget(ratio=0.1)
+    hedges = 0
+    for _ in range(100):
+        budget.on_call()
+        hedges += budget.try_spend()
+
+    assert hedges == 10
@@ -0,0 +1,50 @@
+import gzip
+
+from src.api.responses import compress, compute_etag
+from src.services.store_versions import StoreVersionRegistry
+
+BODY = b'{"answer": "' + b"respuesta " * 100 + b'"}'
+
+
+def test_compress_prefers_gzip_when_brotli_is_missing_or_refused():
+    body, encoding = compress(BODY, "br;q=0, gzip")
+    assert encoding == "gzip"
+    assert gzip.decompress(body) == BODY
+
+
+def test_compress_respects_identity_and_small_bodies():
+    assert compress(BODY, "identity") == (BODY, None)
+    assert compress(b"{}", "gzip") == (b"{}", None)
+
+
+def test_etag_is_stable_for_equivalent_queries():
+    a = compute_etag("e.1", "fp", "store", "default", "¿Qué es una AFORE?", False)
+    b = compute_etag("e.1", "fp", "store", "default", "que es una afore", False)
+    assert a == b
+    assert a != compute_etag("e.2", "fp", "store", "default", "que es una afore", False)
+    assert a != compute_etag("e.1", "fp2", "store", "default", "que es una afore", False)
+    assert a != compute_etag("e.1", "fp", "store", "default", "que es una afore", True)
+
+
+def test_store_versions_are_shared_between_workers(tmp_path):
+    path = tmp_path / "versions.json"
+    worker_a = StoreVersionRegistry(path)
+    worker_b = StoreVersionRegistry(path)
+    before = worker_b.get("leyes")
+
+    worker_a.on_files_uploaded("leyes", [], ["leyes"])
+
+    assert worker_b.get("leyes") != before
+    assert worker_b.get("leyes") == worker_a.get("leyes")
+
+
+def test_store_versions_file_is_created_on_first_use(tmp_path):
+    path = tmp_path / "versions.json"
+    registry = StoreVersionRegistry(path)
+    assert not path.exists()
+
+    version = registry.get("leyes")
+
+    assert path.exists()
+    assert version.endswith(".0")
+    assert StoreVersionRegistry(path).get("leyes") == version
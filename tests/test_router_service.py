@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from src.services.router_service import QueryRouterService
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / "router_config.yaml"
+    path.write_text(
+        "labels:\n"
+        "  leyes:\n"
+        "    keywords: [artículo, ley federal, reforma constitucional]\n"
+        "  tramites:\n"
+        "    keywords: [requisitos, cita, formulario]\n",
+        encoding="utf-8",
+    )
+    return path
+
+
+def _router(config_path, tmp_path, **kwargs):
+    return QueryRouterService(config_path, tmp_path / "router_index.json", **kwargs)
+
+
+def test_scores_with_seeds(config_path, tmp_path):
+    scores = _router(config_path, tmp_path).score("¿Qué dice el artículo de la ley federal?")
+    assert scores["leyes"] > scores["tramites"]
+
+
+def test_add_documents_rebuilds_index_off_the_query_path(config_path, tmp_path):
+    router = _router(config_path, tmp_path)
+    before = router._index
+
+    router.add_documents("tramites", ["pasaporte consulado renovación pasaporte"])
+
+    assert router._index is not before
+    scores = router.score("renovación de pasaporte")
+    assert scores["tramites"] > scores["leyes"]
+
+
+def test_documents_are_capped_per_label_and_persisted_as_counts(config_path, tmp_path):
+    router = _router(config_path, tmp_path, max_docs_per_label=3)
+    for i in range(10):
+        router.add_documents("leyes", [f"documento {i} reglamento " + "x" * 5000])
+
+    stored = json.loads((tmp_path / "router_index.json").read_text(encoding="utf-8"))
+    assert len(stored["leyes"]) == 3
+    assert all(isinstance(doc, dict) for doc in stored["leyes"])
+    assert "reglam" in stored["leyes"][-1]
+
+    reloaded = _router(config_path, tmp_path, max_docs_per_label=3)
+    assert len(reloaded._docs["leyes"]) == 3
+
@@ -0,0 +1,37 @@
+from src.services.session_service import SessionStore
+
+
+def test_history_round_trip():
+    store = SessionStore(max_sessions=10, ttl_seconds=0, token_budget=1000)
+    store.append_exchange("s1", "¿Qué es una AFORE?", "Una administradora de fondos.")
+
+    history, summary = store.get_history("s1")
+
+    assert history == [
+        {"role": "user", "text": "¿Qué es una AFORE?"},
+        {"role": "model", "text": "Una administradora de fondos."},
+    ]
+    assert summary == ""
+
+
+def test_old_turns_are_compacted_within_budget():
+    store = SessionStore(max_sessions=10, ttl_seconds=0, token_budget=100)
+    for i in range(10):
+        store.append_exchange("s1", f"Pregunta {i}. " + "detalle " * 20, f"Respuesta {i}. " + "texto " * 20)
+
+    history, summary = store.get_history("s1")
+
+    # El último intercambio se conserva completo; lo anterior queda resumido
+    assert history[-2]["text"].startswith("Pregunta 9.")
+    assert history[-1]["text"].startswith("Respuesta 9.")
+    assert "Usuario: Pregunta 8." in summary
+    assert store._sessions["s1"].tokens <= 100
+
+
+def test_sessions_are_evicted_lru():
+    store = SessionStore(max_sessions=2, ttl_seconds=0, token_budget=1000)
+    for session_id in ("a", "b", "c"):
+        store.append_exchange(session_id, "hola", "hola")
+
+    assert store.get_history("a") == ([], "")
+    assert store.get_history("c")[0]